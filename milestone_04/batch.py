@@ -0,0 +1,566 @@
+# batch.py
+# Headless counting of recorded video files, no Flask and no rendering.
+# Files are spread over a process pool; each worker loads YOLO once.
+#   python batch.py videos/*.mp4 --out dashboard/exports/batch --workers 4
+#   python batch.py cam1.mp4 --zones site_zones.json --format parquet --interval 5
+# One long file can be split into overlapping segments processed in parallel:
+#   python batch.py recording_12h.mp4 --segments 16 --overlap 2
+# Detections can be recorded once and replayed to tune zones and the tracker:
+#   python batch.py videos/*.mp4 --record dashboard/exports/detections
+#   python batch.py dashboard/exports/detections/* --replay --zones trial_zones.json
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import cv2
+import numpy as np
+import pandas as pd
+
+import zones as zones_module
+from zones import ZoneManager
+from detection.counter import ZoneCounter
+from detection.line_counter import LineCounter
+from detection.recording import DetectionRecorder, DetectionReplay
+from detection.structs import TRACK_BITS, TRACK_MASK, member
+from detection.tracker import create_tracker, iou_matrix, match
+
+FORMATS = ("csv", "parquet")
+
+_detector = None  # one per worker process, see init_worker()
+_embed_mode = None  # DeepSort embed_mode for this worker's trackers
+
+
+def init_worker(zones_file, threads, model_name, conf_threshold, embed_mode=None):
+    """model_name=None for replay workers, which never run YOLO"""
+    global _detector, _embed_mode
+    zones_module.ZONES_FILE = zones_file
+    _embed_mode = embed_mode
+    if model_name is None:
+        return
+    try:
+        import torch
+        torch.set_num_threads(threads)  # workers x threads should not exceed the cores
+    except ImportError:
+        pass
+    from detection.detector import YOLODetector
+    _detector = YOLODetector(model_name=model_name, conf_threshold=conf_threshold)
+
+
+def load_layout():
+    manager = ZoneManager()
+    if not manager.load_zones():
+        raise ValueError(f"{zones_module.ZONES_FILE} could not be parsed")
+    return manager
+
+
+def frame_time(cap, index, fps):
+    """Media time (s) of the frame just read, falling back to index / fps"""
+    msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+    if msec > 0 or index == 0:
+        return msec / 1000.0
+    return index / fps if fps > 0 else float(index)
+
+
+class RecordingZoneCounter(ZoneCounter):
+    """ZoneCounter that also logs every counted (zone, track) key with its frame number"""
+
+    def reset(self):
+        super().reset()
+        self.frame_no = 0
+        self.events = []
+
+    def _mark_seen(self, keys, now):
+        known, _ = member(self.seen_keys, keys)
+        if not known.all():
+            self.events.append((self.frame_no, keys[~known]))
+        super()._mark_seen(keys, now)
+
+    def take_events(self):
+        """(frames, keys) arrays of everything counted so far"""
+        if not self.events:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        frames = np.concatenate([np.full(len(keys), f, np.int64) for f, keys in self.events])
+        keys = np.concatenate([keys for _, keys in self.events])
+        return frames, keys
+
+
+def _boxes_log(log):
+    """[(frame, ids, boxes)] -> (frames, ids, boxes) arrays"""
+    if not log:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty((0, 4), np.float32)
+    frames = np.concatenate([np.full(len(ids), f, np.int64) for f, ids, _ in log])
+    ids = np.concatenate([ids for _, ids, _ in log])
+    boxes = np.concatenate([boxes for _, _, boxes in log])
+    return frames, ids, boxes
+
+
+def video_frames(path, detector, first=0, end_frame=None):
+    """Yield (frame_no, media_s, frame, detections, None) for a video file from frame `first`"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if first:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+        actual = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        if actual != first:
+            print(f"{path}: seek to frame {first} landed on {actual}")
+            first = actual
+    index = first
+    try:
+        while end_frame is None or index < end_frame:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            media_s = frame_time(cap, index, fps)
+            yield index, media_s, frame, detector.detect(frame), None
+            index += 1
+    finally:
+        cap.release()
+
+
+def recorded_frames(path, first=0, end_frame=None):
+    """Yield the same tuples from a DetectionRecorder directory: no decoding, no inference"""
+    for frame_no, media_s, dets, embeds in DetectionReplay(path):
+        if frame_no < first:
+            continue
+        if end_frame is not None and frame_no >= end_frame:
+            break
+        yield frame_no, media_s, None, dets, embeds
+
+
+def count_video(path, detector, manager, tracker_kind="iou", interval=1.0,
+                start_frame=0, end_frame=None, warmup=0, tail=0, recorder=None):
+    """
+    Detect, track and count frames [start_frame, end_frame) of a video file.
+    Returns rows, one per `interval` seconds of media time: unique entries
+    per zone so far, people inside each zone and line crossings at the end
+    of the interval, plus the mean number of tracked people in it.
+
+    For segments, the `warmup` frames before start_frame are tracked but
+    not counted, and the boxes of those and of the last `tail` frames are
+    kept so stitch_segments() can match track IDs across the boundary.
+    With a DetectionRecorder, every frame's detections are saved as well.
+    """
+    frames = video_frames(path, detector, max(0, start_frame - warmup), end_frame)
+    return count_frames(frames, manager, tracker_kind, interval, start_frame, end_frame, tail, recorder)
+
+
+def count_recording(path, manager, tracker_kind="iou", interval=1.0,
+                    start_frame=0, end_frame=None, warmup=0, tail=0):
+    """count_video() over detections saved by a DetectionRecorder"""
+    frames = recorded_frames(path, max(0, start_frame - warmup), end_frame)
+    return count_frames(frames, manager, tracker_kind, interval, start_frame, end_frame, tail)
+
+
+def count_frames(frames, manager, tracker_kind="iou", interval=1.0,
+                 start_frame=0, end_frame=None, tail=0, recorder=None):
+    """The counting loop behind count_video() and count_recording()"""
+    tracker = create_tracker(tracker_kind, embed_mode=_embed_mode if tracker_kind == "deepsort" else None)
+    counter = RecordingZoneCounter(manager.zones) if manager.zones else None
+    line_counter = LineCounter(manager.lines) if manager.lines else None
+    if recorder is not None and recorder.embeddings:
+        if not hasattr(tracker, "keep_embeds"):
+            raise ValueError("Recording embeddings needs the deepsort tracker")
+        tracker.keep_embeds = True
+
+    rows = []
+    head, tail_log = [], []
+    bucket, people, frames_in_bucket = None, 0, 0
+    row = None
+    first = None
+    counted = 0
+    media_s = 0.0
+    for frame_no, media_s, frame, detections, embeds in frames:
+        if first is None:
+            first = frame_no
+        if embeds is not None and hasattr(tracker, "keep_embeds"):
+            tracks = tracker.update(detections, frame, embeds=embeds)
+        else:
+            tracks = tracker.update(detections, frame)
+        if recorder is not None:
+            recorder.add(frame_no, media_s, detections, tracker.last_embeds if recorder.embeddings else None)
+        if (frame_no < start_frame or (tail and end_frame is not None and frame_no >= end_frame - tail)) and len(tracks):
+            (head if frame_no < start_frame else tail_log).append((frame_no, tracks["id"], tracks["box"]))
+
+        if frame_no == start_frame and start_frame > first:
+            # Counting starts here; keep what warm-up saw so it isn't counted again
+            if counter is not None:
+                counter.counts[:] = 0
+                counter.events.clear()
+            if line_counter is not None:
+                line_counter.in_counts[:] = 0
+                line_counter.out_counts[:] = 0
+        if counter is not None:
+            counter.frame_no = frame_no
+            counter.update(tracks, now=media_s)
+        if line_counter is not None:
+            line_counter.update(tracks)
+        if frame_no < start_frame:
+            continue  # warm-up: tracker, seen pairs and line anchors only
+        counted += 1
+
+        current = int(media_s // interval)
+        if bucket is not None and current != bucket and row is not None:
+            row["people"] = round(people / frames_in_bucket, 2)
+            row["_frames"] = frames_in_bucket
+            rows.append(row)
+            people, frames_in_bucket = 0, 0
+        bucket = current
+
+        row = {"time_s": round(current * interval, 3), "frame": frame_no}
+        if counter is not None:
+            for zid, count in counter.get_counts().items():
+                row[f"zone_{zid}"] = count
+            for zid, inside in counter.get_occupancy().items():
+                row[f"inside_{zid}"] = inside
+        if line_counter is not None:
+            for lid, c in line_counter.get_counts().items():
+                row[f"{lid}_in"] = c["in"]
+                row[f"{lid}_out"] = c["out"]
+        people += len(tracks)
+        frames_in_bucket += 1
+
+    if row is not None and frames_in_bucket:
+        row["people"] = round(people / frames_in_bucket, 2)
+        row["_frames"] = frames_in_bucket
+        rows.append(row)
+    return {
+        "rows": rows,
+        "frames": counted,
+        "media_seconds": media_s,
+        "events": counter.take_events() if counter is not None else None,
+        "lines": line_counter.get_counts() if line_counter is not None else {},
+        "head": _boxes_log(head),
+        "tail": _boxes_log(tail_log),
+        "embed_skip_ratio": round(tracker.skip_ratio, 4) if hasattr(tracker, "skip_ratio") else None,
+    }
+
+
+def plan_segments(path, segments, overlap_seconds):
+    """[(start_frame, end_frame or None)] and the overlap in frames"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open {path}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    cap.release()
+    overlap = max(int(round(overlap_seconds * fps)), 1)
+    # Segments much shorter than the overlap would spend most time warming up
+    segments = max(1, min(segments, total // (4 * overlap) if total > 0 else 1))
+    bounds = np.linspace(0, total, segments + 1).astype(int)
+    plan = [(int(bounds[i]), int(bounds[i + 1])) for i in range(segments)]
+    plan[-1] = (plan[-1][0], None)  # frame counts can be approximate: read the last one to EOF
+    return plan, overlap
+
+
+def match_tracks(tail, head, iou_threshold=0.5, min_frames=3):
+    """
+    Map head track IDs of a segment to tail track IDs of the previous one,
+    from the frames both tracked. A pair needs min_frames IoU matches.
+    """
+    tail_frames, tail_ids, tail_boxes = tail
+    head_frames, head_ids, head_boxes = head
+    hits = Counter()
+    for f in np.intersect1d(tail_frames, head_frames):
+        a, b = tail_frames == f, head_frames == f
+        iou = iou_matrix(tail_boxes[a], head_boxes[b])
+        pairs, _, _ = match(iou, iou_threshold)
+        for r, c in pairs:
+            hits[(int(head_ids[b][c]), int(tail_ids[a][r]))] += 1
+
+    mapping, used = {}, set()
+    for (head_id, tail_id), n in hits.most_common():
+        if n < min_frames:
+            break
+        if head_id in mapping or tail_id in used:
+            continue
+        mapping[head_id] = tail_id
+        used.add(tail_id)
+    return mapping
+
+
+def stitch_segments(parts, manager):
+    """
+    Merge per-segment results into one series as if the file had been
+    processed in one pass. Tracks matched across a boundary share a global
+    ID, and a (zone, track) entry already counted in an earlier segment is
+    not counted again. Line crossings can't repeat: each segment only
+    counts crossings that end inside its own frames.
+    """
+    zone_ids = [zone['id'] for zone in manager.zones]
+    next_gid = 0
+    counted = set()          # (zone index, global id)
+    kept = []                # (frame, zone index)
+    duplicates = 0
+    prev_gids = {}
+    line_offset = {line['id']: {"in": 0, "out": 0} for line in manager.lines}
+    merged = {}
+
+    for k, part in enumerate(parts):
+        matches = match_tracks(parts[k - 1]["tail"], part["head"]) if k else {}
+        gids, inherited = {}, set()
+
+        def gid_of(lid):
+            nonlocal next_gid
+            g = gids.get(lid)
+            if g is None:
+                if lid in matches and matches[lid] in prev_gids:
+                    g = prev_gids[matches[lid]]
+                    inherited.add(g)
+                else:
+                    g = next_gid
+                    next_gid += 1
+                gids[lid] = g
+            return g
+
+        # Make sure every matched tail track of the previous segment has a gid
+        for lid in matches:
+            gid_of(lid)
+
+        if part["events"] is not None:
+            seen_here = set()
+            for f, key in zip(*part["events"]):
+                zi, g = int(key >> TRACK_BITS), gid_of(int(key & TRACK_MASK))
+                pair = (zi, g)
+                if pair not in seen_here:
+                    seen_here.add(pair)
+                    if g in inherited and pair in counted:
+                        duplicates += 1
+                        continue
+                counted.add(pair)
+                kept.append((int(f), zi))
+
+        for row in part["rows"]:
+            row = dict(row)
+            for lid, offset in line_offset.items():
+                row[f"{lid}_in"] = row.get(f"{lid}_in", 0) + offset["in"]
+                row[f"{lid}_out"] = row.get(f"{lid}_out", 0) + offset["out"]
+            prev = merged.get(row["time_s"])
+            if prev is not None:
+                # Interval split across a boundary: later values win, people is frame-weighted
+                n = prev["_frames"] + row["_frames"]
+                row["people"] = round((prev["people"] * prev["_frames"] + row["people"] * row["_frames"]) / n, 2)
+                row["_frames"] = n
+            merged[row["time_s"]] = row
+        for lid, c in part["lines"].items():
+            line_offset[lid]["in"] += c["in"]
+            line_offset[lid]["out"] += c["out"]
+
+        # Only the boundary tracks matter to the next segment
+        tail_ids = set(part["tail"][1].tolist())
+        prev_gids = {lid: gid_of(lid) for lid in tail_ids}
+
+    # Zone counts from the deduplicated entries
+    rows = [merged[t] for t in sorted(merged)]
+    kept_arr = np.array(kept, dtype=np.int64).reshape(-1, 2)
+    row_frames = np.array([row["frame"] for row in rows], dtype=np.int64)
+    for zi, zid in enumerate(zone_ids):
+        frames = np.sort(kept_arr[kept_arr[:, 1] == zi, 0])
+        counts = np.searchsorted(frames, row_frames, side='right')
+        for row, count in zip(rows, counts):
+            row[f"zone_{zid}"] = int(count)
+    return rows, duplicates
+
+
+def write_series(rows, path, fmt, start_time=None):
+    """start_time: epoch of the recording's first frame, adds an absolute 'ts' column"""
+    df = pd.DataFrame([{k: v for k, v in row.items() if not k.startswith("_")} for row in rows])
+    if start_time is not None and len(df):
+        df.insert(1, "ts", (start_time + df["time_s"]).round(3))
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def output_path(path, out_dir, fmt):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(out_dir, f"{stem}_counts.{fmt}")
+
+
+def _tracker_stats(result):
+    return {"embed_skip_ratio": result["embed_skip_ratio"]} if result["embed_skip_ratio"] is not None else {}
+
+
+def file_summary(path, output, frames, media_s, wall, **extra):
+    return dict({
+        "file": path,
+        "output": output,
+        "frames": frames,
+        "video_seconds": round(media_s, 2),
+        "wall_seconds": round(wall, 2),
+        "fps": round(frames / wall, 1) if wall > 0 else 0.0,
+        "realtime_factor": round(media_s / wall, 2) if wall > 0 else 0.0,
+    }, **extra)
+
+
+def process_file(path, out_dir, fmt="csv", tracker_kind="iou", interval=1.0, start_time=None,
+                 record_dir=None, embeddings=False):
+    """Worker entry point: count one file and write its time series"""
+    started = time.perf_counter()
+    if record_dir is None:
+        result = count_video(path, _detector, load_layout(), tracker_kind, interval)
+    else:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        with DetectionRecorder(os.path.join(record_dir, stem), embeddings=embeddings, source=path) as recorder:
+            result = count_video(path, _detector, load_layout(), tracker_kind, interval, recorder=recorder)
+    output = output_path(path, out_dir, fmt)
+    write_series(result["rows"], output, fmt, start_time)
+    return file_summary(path, output, result["frames"], result["media_seconds"], time.perf_counter() - started,
+                        **_tracker_stats(result))
+
+
+def replay_file(path, out_dir, fmt="csv", tracker_kind="iou", interval=1.0, start_time=None):
+    """Worker entry point: count one recording and write its time series"""
+    started = time.perf_counter()
+    if tracker_kind == "deepsort" and not DetectionReplay(path).has_embeddings:
+        raise ValueError("DeepSort replay needs a recording made with --record-embeddings")
+    result = count_recording(path, load_layout(), tracker_kind, interval)
+    output = output_path(path.rstrip(os.sep), out_dir, fmt)
+    write_series(result["rows"], output, fmt, start_time)
+    return file_summary(path, output, result["frames"], result["media_seconds"], time.perf_counter() - started,
+                        **_tracker_stats(result))
+
+
+def process_segment(path, start, end, overlap, tracker_kind="iou", interval=1.0):
+    """Worker entry point: count one segment, results are stitched by the parent"""
+    return count_video(path, _detector, load_layout(), tracker_kind, interval,
+                       start_frame=start, end_frame=end, warmup=overlap if start else 0,
+                       tail=overlap if end is not None else 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count people in recorded video files")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--out", default="dashboard/exports/batch")
+    parser.add_argument("--zones", default=zones_module.ZONES_FILE)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds of video per output row")
+    parser.add_argument("--tracker", default="iou", help="deepsort or iou")
+    parser.add_argument("--embed-mode", choices=("always", "on_demand"),
+                        help="deepsort only: embed every detection, or only ambiguous ones")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--threads", type=int, default=2, help="torch threads per worker")
+    parser.add_argument("--segments", type=int, default=1, help="split each file into this many parallel segments")
+    parser.add_argument("--overlap", type=float, default=2.0, help="seconds each segment re-tracks before its start")
+    parser.add_argument("--start-time", help="recording start (ISO 8601) to add absolute timestamps")
+    parser.add_argument("--record", metavar="DIR", help="also save each file's detections under DIR/<name>/")
+    parser.add_argument("--record-embeddings", action="store_true",
+                        help="save DeepSort embeddings too, so deepsort replays are deterministic")
+    parser.add_argument("--replay", action="store_true",
+                        help="files are --record directories: track and count without decoding or YOLO")
+    parser.add_argument("--model", default="yolov8n.pt")
+    parser.add_argument("--conf", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    if args.format == "parquet":
+        try:
+            pd.io.parquet.get_engine("auto")
+        except ImportError as e:
+            parser.error(f"parquet output needs pyarrow or fastparquet: {e}")
+    start_time = None
+    if args.start_time:
+        try:
+            start_time = datetime.fromisoformat(args.start_time).timestamp()
+        except ValueError:
+            parser.error("--start-time must be an ISO 8601 time, e.g. 2024-05-01T08:00:00")
+    if args.segments > 1 and (args.record or args.replay):
+        parser.error("--segments can't be combined with --record or --replay")
+    if args.embed_mode and args.tracker != "deepsort":
+        parser.error("--embed-mode needs --tracker deepsort")
+    if args.record_embeddings and (not args.record or args.tracker != "deepsort"):
+        parser.error("--record-embeddings needs --record and --tracker deepsort")
+    missing = [f for f in args.files if not os.path.exists(f)]
+    if missing:
+        parser.error(f"not found: {', '.join(missing)}")
+    # Outputs and recordings are named after the file, so a/cam1.mp4 and b/cam1.mp4 would clash
+    by_output = {}
+    for f in args.files:
+        by_output.setdefault(output_path(f.rstrip(os.sep), args.out, args.format), []).append(f)
+    clashes = ["; ".join(files) for files in by_output.values() if len(files) > 1]
+    if clashes:
+        parser.error(f"files with the same name would overwrite each other's output and recordings: {' | '.join(clashes)}")
+    os.makedirs(args.out, exist_ok=True)
+
+    started = time.perf_counter()
+    results, failed = [], []
+    jobs = len(args.files) * max(args.segments, 1)
+    workers = min(args.workers, jobs)
+
+    def report(result):
+        results.append(result)
+        print(f"{result['file']}: {result['frames']} frames in {result['wall_seconds']}s "
+              f"({result['fps']} fps, {result['realtime_factor']}x realtime) -> {result['output']}"
+              + (f", {result['embed_skip_ratio']:.0%} embeddings reused" if "embed_skip_ratio" in result else ""))
+
+    model = None if args.replay else args.model
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(args.zones, args.threads, model, args.conf, args.embed_mode)) as pool:
+        if args.segments > 1:
+            zones_module.ZONES_FILE = args.zones
+            manager = load_layout()
+            planned = {}
+            for f in args.files:
+                plan, overlap = plan_segments(f, args.segments, args.overlap)
+                planned[f] = [pool.submit(process_segment, f, start, end, overlap, args.tracker, args.interval)
+                              for start, end in plan]
+            for f, futures in planned.items():
+                try:
+                    parts = [future.result() for future in futures]
+                except Exception as e:
+                    print(f"FAILED {f}: {e}")
+                    failed.append({"file": f, "error": str(e)})
+                    continue
+                rows, duplicates = stitch_segments(parts, manager)
+                output = output_path(f, args.out, args.format)
+                write_series(rows, output, args.format, start_time)
+                report(file_summary(f, output, sum(p["frames"] for p in parts), parts[-1]["media_seconds"],
+                                    time.perf_counter() - started, segments=len(parts),
+                                    duplicate_entries_removed=duplicates))
+        else:
+            if args.replay:
+                futures = {pool.submit(replay_file, f, args.out, args.format, args.tracker, args.interval,
+                                       start_time): f
+                           for f in args.files}
+            else:
+                futures = {pool.submit(process_file, f, args.out, args.format, args.tracker, args.interval,
+                                       start_time, args.record, args.record_embeddings): f
+                           for f in args.files}
+            for future in as_completed(futures):
+                try:
+                    report(future.result())
+                except Exception as e:
+                    print(f"FAILED {futures[future]}: {e}")
+                    failed.append({"file": futures[future], "error": str(e)})
+
+    wall = time.perf_counter() - started
+    frames = sum(r["frames"] for r in results)
+    video = sum(r["video_seconds"] for r in results)
+    summary = {
+        "mode": "replay" if args.replay else "record" if args.record else "video",
+        "workers": workers,
+        "threads_per_worker": args.threads,
+        "segments_per_file": args.segments,
+        "files": len(results),
+        "failed": failed,
+        "frames": frames,
+        "video_seconds": round(video, 2),
+        "wall_seconds": round(wall, 2),
+        "fps": round(frames / wall, 1) if wall > 0 else 0.0,
+        "realtime_factor": round(video / wall, 2) if wall > 0 else 0.0,
+        "per_file": sorted(results, key=lambda r: r["file"]),
+    }
+    with open(os.path.join(args.out, "summary.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"\n{len(results)} files, {frames} frames in {wall:.1f}s: {summary['fps']} fps overall, "
+          f"{summary['realtime_factor']}x realtime with {workers} workers")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+# benchmarks/bench_allocations.py
+# Per-frame memory allocated by each pipeline stage, measured with tracemalloc
+# on a synthetic scene with the stub detector.
+# Run from milestone_04:  python -m benchmarks.bench_allocations [--people 60]
+import argparse
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from benchmarks.scenes import SyntheticScene, StubDetector, make_zones, make_lines
+from detection.counter import ZoneCounter
+from detection.line_counter import LineCounter
+from detection.tracker import IoUTracker
+
+
+def measure(step, n, warmup=10):
+    """
+    Mean and max bytes allocated while step(i) runs (peak above the memory
+    in use before it), plus what is still held after n frames.
+    """
+    for i in range(warmup):
+        step(i)
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        transient = np.empty(n)
+        for i in range(n):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            step(i)
+            transient[i] = tracemalloc.get_traced_memory()[1] - before
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return {
+        "mean_kib": round(float(transient.mean()) / 1024, 2),
+        "max_kib": round(float(transient.max()) / 1024, 2),
+        "retained_kib": round(retained / 1024, 2),
+    }
+
+
+def run(frames=200, people=30, width=640, height=480):
+    scene = SyntheticScene(width, height, people=people)
+    rendered = list(scene.frames(frames))
+    images = [f for f, _ in rendered]
+    boxes = [b for _, b in rendered]
+
+    detector = StubDetector(boxes)
+    detections = [detector.detect(None) for _ in range(frames)]
+    tracker = IoUTracker(min_hits=1)
+    tracks = [tracker.update(d) for d in detections]
+    display = images[0].copy()
+
+    def draw(i):
+        for (l, t, r, b), tid in zip(tracks[i]["box"].astype(np.int32).tolist(), tracks[i]["id"].tolist()):
+            cv2.rectangle(display, (l, t), (r, b), (0, 255, 255), 2)
+            cv2.putText(display, f"ID:{tid}", (l, t - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+
+    tracker = IoUTracker(min_hits=1)
+    counter = ZoneCounter(make_zones(width, height))
+    line_counter = LineCounter(make_lines(width, height))
+    stages = {
+        "detect": lambda i: detector.detect(None),
+        "track": lambda i: tracker.update(detections[i]),
+        "zones": lambda i: counter.update(tracks[i], now=i / 30.0),
+        "lines": lambda i: line_counter.update(tracks[i]),
+        "draw": draw,
+    }
+    return {name: measure(step, frames) for name, step in stages.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Allocations per frame by pipeline stage")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--people", type=int, default=30)
+    args = parser.parse_args()
+    print(f"{'stage':<8} {'mean KiB/frame':>15} {'max KiB':>9} {'retained KiB':>13}")
+    for name, row in run(args.frames, args.people).items():
+        print(f"{name:<8} {row['mean_kib']:>15.2f} {row['max_kib']:>9.2f} {row['retained_kib']:>13.2f}")
@@ -0,0 +1,89 @@
+# benchmarks/bench_detector_pool.py
+# Detection throughput of DetectorPool as the number of workers grows.
+# Run from milestone_04:  python -m benchmarks.bench_detector_pool [--yolo] [--workers 1 2 4 8]
+# Without --yolo a CPU-bound stub stands in for the model.
+import argparse
+import functools
+import os
+import threading
+import time
+import numpy as np
+
+from detection.detector_pool import DetectorPool
+
+
+class StubDetector:
+    """Fixed amount of single-threaded CPU work per frame, returns no detections"""
+
+    def __init__(self, work=40):
+        self.work = work
+        self.weights = np.random.default_rng(0).standard_normal((256, 256)).astype(np.float32)
+
+    def detect(self, frame):
+        x = frame[:256, :256, 0].astype(np.float32) / 255.0
+        for _ in range(self.work):
+            x = np.tanh(x @ self.weights)
+        return []
+
+
+def make_stub(work):
+    return StubDetector(work)
+
+
+def measure(pool, frames, cameras, seconds):
+    """cameras threads call pool.detect() in a loop, like one processing loop each"""
+    stop = time.monotonic() + seconds
+    done = [0] * cameras
+
+    def camera_loop(i):
+        n = 0
+        while time.monotonic() < stop:
+            pool.detect(frames[n % len(frames)])
+            n += 1
+        done[i] = n
+
+    threads = [threading.Thread(target=camera_loop, args=(i,)) for i in range(cameras)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(done) / (time.perf_counter() - t0)
+
+
+def run(worker_counts=(1, 2, 4), yolo=False, seconds=5.0, threads_per_worker=1, pin_cpus=False):
+    # BLAS threads in the workers would hide the scaling we want to see
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads_per_worker))
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, size=(480, 640, 3), dtype=np.uint8) for _ in range(8)]
+    factory = None if yolo else functools.partial(make_stub, 40)
+
+    results = []
+    for n in worker_counts:
+        pool = DetectorPool(workers=n, threads_per_worker=threads_per_worker,
+                            pin_cpus=pin_cpus, detector_factory=factory)
+        try:
+            pool.detect(frames[0])  # warm-up: first inference in each worker is slow
+            fps = measure(pool, frames, cameras=max(2 * n, 2), seconds=seconds)
+        finally:
+            pool.shutdown()
+        results.append({"workers": n, "fps": fps})
+    base = results[0]["fps"] or 1.0
+    for row in results:
+        row["speedup"] = row["fps"] / base
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--yolo", action="store_true", help="benchmark the real YOLOv8 model")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads per worker")
+    parser.add_argument("--pin", action="store_true", help="pin each worker to its own CPUs")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'frames/s':>10} {'speedup':>8}")
+    for row in run(args.workers, args.yolo, args.seconds, args.threads, args.pin):
+        print(f"{row['workers']:>8} {row['fps']:>10.1f} {row['speedup']:>7.2f}x")
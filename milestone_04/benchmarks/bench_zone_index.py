@@ -0,0 +1,69 @@
+# benchmarks/bench_zone_index.py
+# Per-frame ZoneCounter.update() cost as the number of zones grows.
+# Run from milestone_04:  python -m benchmarks.bench_zone_index
+import time
+import numpy as np
+
+from detection.counter import ZoneCounter
+from detection.structs import make_tracks as track_array
+
+WIDTH, HEIGHT = 1920, 1080
+
+
+def make_zones(n, seed=0):
+    """n small quadrilaterals tiled over the frame, like seating blocks"""
+    rng = np.random.default_rng(seed)
+    cols = int(np.ceil(np.sqrt(n * WIDTH / HEIGHT)))
+    rows = int(np.ceil(n / cols))
+    cw, ch = WIDTH // cols, HEIGHT // rows
+    zones = []
+    for i in range(n):
+        x, y = (i % cols) * cw, (i // cols) * ch
+        jitter = rng.integers(0, max(cw // 8, 1), size=4)
+        points = [[x + jitter[0], y], [x + cw, y + jitter[1]],
+                  [x + cw - jitter[2], y + ch], [x, y + ch - jitter[3]]]
+        zones.append({"id": i + 1, "name": f"Zone {i + 1}", "points": points})
+    return zones
+
+
+def make_tracks(frames, people=60, seed=1):
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform([0, 0], [WIDTH, HEIGHT], size=(people, 2))
+    vel = rng.normal(0, 4, size=(people, 2))
+    out = []
+    for _ in range(frames):
+        pos = np.clip(pos + vel, 0, [WIDTH - 1, HEIGHT - 1])
+        out.append(track_array(np.stack([pos[:, 0] - 20, pos[:, 1] - 80, pos[:, 0] + 20, pos[:, 1]], axis=1),
+                               np.arange(people)))
+    return out
+
+
+class NaiveCounter(ZoneCounter):
+    """Reference: every track against every zone, as before the grid index"""
+
+    def update(self, tracks, now=None):
+        for centroid in map(tuple, tracks["anchor"].astype(np.int32).tolist()):
+            for polygon in self.polygons:
+                self.point_in_polygon(centroid, polygon)
+
+
+def run(zone_counts=(3, 10, 50, 100, 250, 500), frames=200, people=60):
+    tracks = make_tracks(frames, people)
+    results = []
+    for n in zone_counts:
+        zones = make_zones(n)
+        row = {"zones": n}
+        for name, cls in (("indexed", ZoneCounter), ("naive", NaiveCounter)):
+            counter = cls(zones)
+            t0 = time.perf_counter()
+            for f, frame_tracks in enumerate(tracks):
+                counter.update(frame_tracks, now=f / 30.0)
+            row[name + "_ms"] = (time.perf_counter() - t0) * 1000 / frames
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'zones':>6} {'indexed ms/frame':>17} {'naive ms/frame':>15}")
+    for row in run():
+        print(f"{row['zones']:>6} {row['indexed_ms']:>17.3f} {row['naive_ms']:>15.3f}")
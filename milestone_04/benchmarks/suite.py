@@ -0,0 +1,272 @@
+# benchmarks/suite.py
+# Per-stage micro-benchmarks and an end-to-end FPS run on synthetic scenes,
+# with results saved as JSON and compared against a stored baseline.
+# Run from milestone_04:
+#   python -m benchmarks.suite                     compare with benchmarks/baseline.json
+#   python -m benchmarks.suite --update-baseline   store this run as the baseline
+#   python -m benchmarks.suite --only heatmap encode --people 60
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.scenes import SyntheticScene, StubDetector, make_zones, make_lines
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def build_scene(frames, people, width=640, height=480, seed=0):
+    scene = SyntheticScene(width, height, people=people, seed=seed)
+    rendered = list(scene.frames(frames))
+    return [f for f, _ in rendered], [b for _, b in rendered]
+
+
+def track_sequence(boxes, seed=0):
+    """Tracker output per frame, so zone benchmarks don't time the tracker"""
+    from detection.tracker import IoUTracker
+    tracker = IoUTracker(min_hits=1)
+    detector = StubDetector(boxes, seed=seed)
+    return [tracker.update(detector.detect(None)) for _ in boxes]
+
+
+# Each setup(ctx) returns step(i), timed once per frame index i
+def setup_point_in_zone(ctx):
+    from detection.counter import ZoneCounter
+    counter = ZoneCounter(make_zones(ctx["width"], ctx["height"]))
+    tracks = ctx["tracks"]
+    return lambda i: counter.update(tracks[i], now=i / 30.0)
+
+
+def setup_heatmap(ctx):
+    from detection.counter import ZoneCounter
+    counter = ZoneCounter(make_zones(ctx["width"], ctx["height"]))
+    frames, tracks = ctx["frames"], ctx["tracks"]
+    return lambda i: counter.update_heatmap(frames[i], tracks[i])
+
+
+def setup_overlay(ctx):
+    from zones import ZoneManager
+    manager = ZoneManager()
+    manager.zones = make_zones(ctx["width"], ctx["height"])
+    manager.lines = make_lines(ctx["width"], ctx["height"])
+    frames = ctx["frames"]
+    return lambda i: manager.draw_zones(frames[i].copy(), show_labels=True)
+
+
+def setup_encode(ctx):
+    frames = ctx["frames"]
+    return lambda i: cv2.imencode('.jpg', frames[i])
+
+
+def setup_tracker_iou(ctx):
+    from detection.tracker import IoUTracker
+    tracker = IoUTracker()
+    detector = StubDetector(ctx["boxes"])  # one per run: detect() steps through the frames
+    detections = [detector.detect(None) for _ in ctx["boxes"]]
+    return lambda i: tracker.update(detections[i])
+
+
+def setup_tracker_deepsort(ctx):
+    from detection.tracker import DeepSortTracker
+    tracker = DeepSortTracker(embed_mode="on_demand")
+    frames = ctx["frames"]
+    detector = StubDetector(ctx["boxes"])
+    detections = [detector.detect(None) for _ in ctx["boxes"]]
+
+    def step(i):
+        tracker.update(detections[i], frames[i])
+    step.stats = lambda: {"embed_skip_ratio": round(tracker.skip_ratio, 4)}
+    return step
+
+
+def setup_data_manager(ctx):
+    from dashboard.data_manager import DataManager
+    from detection.counter import ZoneCounter
+    from detection.line_counter import LineCounter
+    data_manager = DataManager()
+    counter = ZoneCounter(make_zones(ctx["width"], ctx["height"]))
+    lines = LineCounter(make_lines(ctx["width"], ctx["height"]))
+    states = []
+    for i, tracks in enumerate(ctx["tracks"]):
+        counter.update(tracks, now=i / 30.0)
+        lines.update(tracks)
+        states.append((counter.get_counts(), len(tracks), counter.get_occupancy(),
+                       counter.get_dwell_stats(now=i / 30.0), lines.get_counts()))
+    return lambda i: data_manager.update_counts(*states[i])
+
+
+def setup_end_to_end(ctx):
+    """process_video() minus the camera and Flask, with a stub detector"""
+    from dashboard.data_manager import DataManager
+    from detection.counter import ZoneCounter
+    from detection.line_counter import LineCounter
+    from detection.tracker import IoUTracker
+    from zones import ZoneManager
+
+    detector = StubDetector(ctx["boxes"])
+    tracker = IoUTracker()
+    manager = ZoneManager()
+    manager.zones = make_zones(ctx["width"], ctx["height"])
+    manager.lines = make_lines(ctx["width"], ctx["height"])
+    counter = ZoneCounter(manager.zones)
+    line_counter = LineCounter(manager.lines)
+    data_manager = DataManager()
+    frames = ctx["frames"]
+
+    def step(i):
+        frame = frames[i]
+        tracks = tracker.update(detector.detect(frame), frame)
+        counter.update(tracks)
+        heatmap_frame = counter.update_heatmap(frame, tracks)
+        line_counter.update(tracks)
+        data_manager.update_counts(counter.get_counts(), len(tracks), counter.get_occupancy(),
+                                   counter.get_dwell_stats(), line_counter.get_counts())
+        display = manager.draw_zones(heatmap_frame.copy(), show_labels=True)
+        for (l, t, r, b), tid in zip(tracks["box"].astype(np.int32).tolist(), tracks["id"].tolist()):
+            cv2.rectangle(display, (l, t), (r, b), (0, 255, 255), 2)
+            cv2.putText(display, f"ID:{tid}", (l, t - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        _, jpeg = cv2.imencode('.jpg', display)
+        data_manager.update_frame(jpeg.tobytes())
+
+    return step
+
+
+BENCHMARKS = {
+    "point_in_zone": setup_point_in_zone,
+    "heatmap": setup_heatmap,
+    "overlay": setup_overlay,
+    "encode": setup_encode,
+    "tracker_iou": setup_tracker_iou,
+    "tracker_deepsort": setup_tracker_deepsort,
+    "data_manager": setup_data_manager,
+    "end_to_end": setup_end_to_end,
+}
+# Needs the appearance model: only run when asked for
+OPTIONAL = {"tracker_deepsort"}
+
+
+def time_steps(step, n, warmup=10):
+    for i in range(min(warmup, n)):
+        step(i)
+    times = np.empty(n)
+    for i in range(n):
+        t0 = time.perf_counter()
+        step(i)
+        times[i] = time.perf_counter() - t0
+    return {
+        "median_ms": round(float(np.median(times)) * 1000, 4),
+        "p95_ms": round(float(np.percentile(times, 95)) * 1000, 4),
+        "mean_ms": round(float(times.mean()) * 1000, 4),
+        "iterations": n,
+    }
+
+
+def run(names=None, frames=200, people=30, width=640, height=480, seed=0):
+    names = names or [n for n in BENCHMARKS if n not in OPTIONAL]
+    scene_frames, boxes = build_scene(frames, people, width, height, seed)
+    ctx = {"frames": scene_frames, "boxes": boxes, "tracks": track_sequence(boxes, seed),
+           "width": width, "height": height}
+
+    results = {}
+    for name in names:
+        step = BENCHMARKS[name](ctx)
+        result = time_steps(step, frames)
+        if hasattr(step, "stats"):
+            result.update(step.stats())
+        if name == "end_to_end":
+            result["fps"] = round(1000 / result["mean_ms"], 1)
+        results[name] = result
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "frames": frames,
+            "people": people,
+            "resolution": f"{width}x{height}",
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.25):
+    """Rows of (name, baseline ms, current ms, ratio, regressed) on median time"""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            rows.append((name, None, result["median_ms"], None, False))
+            continue
+        ratio = result["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+        rows.append((name, base["median_ms"], result["median_ms"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CrowdCount benchmark suite")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--people", type=int, default=30)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown of the median before failing (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    current = run(args.only, frames=args.frames, people=args.people)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("people") != args.people or baseline.get("meta", {}).get("frames") != args.frames:
+            print("Note: baseline was recorded with a different scene, ratios are not comparable")
+    # Timings from another kind of machine say nothing about this change
+    other_machine = [key for key in ("machine", "cpus")
+                     if key in baseline.get("meta", {}) and baseline["meta"][key] != current["meta"][key]]
+    if other_machine:
+        print("Warning: baseline was recorded on a different machine ("
+              + ", ".join(f"{key} {baseline['meta'][key]} vs {current['meta'][key]}" for key in other_machine)
+              + "), regressions are reported but not failed")
+
+    print(f"{'benchmark':<18} {'baseline ms':>12} {'median ms':>10} {'p95 ms':>9} {'ratio':>7}")
+    regressions = []
+    p95 = {name: r["p95_ms"] for name, r in current["results"].items()}
+    for name, base, now, ratio, regressed in compare(current, baseline, args.threshold):
+        base_text = f"{base:.3f}" if base is not None else "-"
+        ratio_text = f"{ratio:.2f}" if ratio is not None else "-"
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<18} {base_text:>12} {now:>10.3f} {p95[name]:>9.3f} {ratio_text:>7}{flag}")
+        if regressed:
+            regressions.append(name)
+    if "end_to_end" in current["results"]:
+        print(f"End-to-end: {current['results']['end_to_end']['fps']} FPS (stub detector)")
+    if "tracker_deepsort" in current["results"]:
+        print(f"DeepSort on_demand: {current['results']['tracker_deepsort']['embed_skip_ratio']:.1%} "
+              f"of embeddings reused")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 0 if other_machine else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,68 @@
+import random
+import time
 import cv2
 import numpy as np
 
+# Health states reported by CameraFeed.health()
+STATES = ("connecting", "live", "stalled", "failed", "ended")
+
+
 class CameraFeed:
-    def __init__(self, source=0):
+    def __init__(self, source=0, loop=False, max_reconnects=10, backoff=0.5, max_backoff=30.0, media_start=None,
+                 read_timeout=2.0):
         """
         Initialize camera feed
         source: 0 for webcam, 1 for USB camera, or IP camera URL
+        loop: restart video files from the beginning at end of file
+        max_reconnects: failed reconnect attempts in a row before giving up (None = forever)
+        backoff / max_backoff: reconnect delay, doubled per failure with jitter
+        media_start: epoch time of a video file's first frame (default: when it is opened)
+        read_timeout: seconds a network stream's open or read may block, so an
+          interrupt() is noticed even while the stream is stalled
+
+        After each successful read_frame(), frame_time holds the frame's epoch
+        timestamp: media_start + position in the file for video files, the
+        capture time for live sources.
+
+        A read that fails in the middle of a video file reopens it at the
+        frame after the last one read, so nothing is counted twice; if the
+        reopened file can't seek there, the feed ends instead.
         """
         self.cap = None
         self.source = source
         self.is_opened = False
+        self.loop = loop
+        self.max_reconnects = max_reconnects
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.is_file = isinstance(source, str) and "://" not in source
+
+        self.state = "connecting"
+        self.state_since = time.monotonic()
+        self.state_durations = {s: 0.0 for s in STATES}
+        self.reconnects = 0          # successful reconnects
+        self.failed_attempts = 0     # failed attempts since the last success
+        self.next_attempt = 0.0
+        self.last_error = None
+        self.stopped = False  # set by stop_camera(), disables reconnects
+        self.interrupted = False  # set by interrupt() from another thread, never cleared
+        self.read_timeout = read_timeout
 
+        self.media_start = media_start
+        self.loop_offset = 0.0  # media seconds played before the last loop restart
+        self.last_pos = 0.0     # media position (s) of the last frame read
+        self.frame_time = None
+        self.resume_frame = 0     # next frame to read in a video file, kept across reopens
+        self.reads_since_open = 0
+
+    def _set_state(self, state):
+        if state == self.state:
+            return
+        now = time.monotonic()
+        self.state_durations[self.state] += now - self.state_since
+        print(f"Camera {self.source}: {self.state} -> {state}")
+        self.state = state
+        self.state_since = now
 
      # In camera_feed.py, modify start_camera method
     def start_camera(self):
@@ -23,50 +75,173 @@ class CameraFeed:
             if isinstance(self.source, str) and self.source.lower().endswith(('.mp4', '.avi', '.mov')):
                 backend = cv2.CAP_FFMPEG
 
-            self.cap = cv2.VideoCapture(self.source, backend)
+            params = []
+            if isinstance(self.source, str) and "://" in self.source and self.read_timeout:
+                ms = int(self.read_timeout * 1000)
+                params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, ms]
+            self.cap = cv2.VideoCapture(self.source, backend, params)
             if not self.cap.isOpened():
                 print(f"Error: Cannot open source {self.source}")
+                self.last_error = f"Cannot open source {self.source}"
+                self.is_opened = False
                 return False
 
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
             self.cap.set(cv2.CAP_PROP_FPS, 30)
 
+            if self.is_file and self.resume_frame:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.resume_frame)
+                actual = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+                if actual < self.resume_frame:
+                    # Starting over would count the video again
+                    print(f"Camera {self.source}: cannot resume at frame {self.resume_frame}, ending feed")
+                    self.last_error = f"Cannot seek back to frame {self.resume_frame}"
+                    self.cap.release()
+                    self.is_opened = False
+                    self._set_state("ended")
+                    return False
+            self.reads_since_open = 0
+
             self.is_opened = True
+            self.stopped = False
+            self.failed_attempts = 0
+            if self.is_file and self.media_start is None:
+                self.media_start = time.time()
             print("Camera started successfully")
             return True
         except Exception as e:
             print(f"Error starting camera: {e}")
-            return False   
-        
-    
+            self.last_error = str(e)
+            self.is_opened = False
+            return False
+
+
     def read_frame(self):
-        """Read a frame from camera"""
+        """
+        Read a frame from camera. On failure this never blocks: it schedules
+        reconnect attempts with exponential backoff and jitter, and returns
+        (False, None) until the source is back.
+        """
+        if self.stopped or self.interrupted:
+            self._release()
+            return False, None
+        if self.state in ("failed", "ended"):
+            return False, None
+
         if not self.is_opened or self.cap is None:
+            self._try_reconnect()
             return False, None
-            
+
         ret, frame = self.cap.read()
+        if self.interrupted:  # while blocked in read()
+            self._release()
+            return False, None
+        if not ret and self.is_file and self._at_end():
+            if self.loop:
+                fps = self.cap.get(cv2.CAP_PROP_FPS)
+                self.loop_offset += self.last_pos + (1.0 / fps if fps > 0 else 0.0)
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                self.resume_frame = 0
+                ret, frame = self.cap.read()
+            else:
+                print("End of video file.")
+                self._set_state("ended")
+                return False, None
+
         if not ret:
             print("Can't receive frame. Camera may be disconnected.")
+            self.last_error = "Read failed"
+            if self.is_file and self.reads_since_open == 0:
+                self.resume_frame += 1  # failed again right after resuming: skip the unreadable frame
+            self._set_state("stalled")
+            self.is_opened = False
+            self.next_attempt = time.monotonic() + self._delay()
             return False, None
-            
+
+        self.reads_since_open += 1
+        if self.is_file:
+            self.resume_frame = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+            self.last_pos = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            self.frame_time = self.media_start + self.loop_offset + self.last_pos
+        else:
+            self.frame_time = time.time()
+        self._set_state("live")
         return True, frame
-    
-    def stop_camera(self):
-        """Stop and release camera"""
+
+    def _at_end(self):
+        total = self.cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        pos = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
+        return total > 0 and pos >= total - 1
+
+    def _delay(self):
+        delay = min(self.backoff * (2 ** self.failed_attempts), self.max_backoff)
+        return delay * (0.5 + random.random())
+
+    def _try_reconnect(self):
+        now = time.monotonic()
+        if now < self.next_attempt:
+            return
+        if self.state != "stalled":
+            self._set_state("connecting")
+        if self.start_camera():
+            self.reconnects += 1
+            return
+        if self.state == "ended":
+            return
+        self.failed_attempts += 1
+        if self.max_reconnects is not None and self.failed_attempts >= self.max_reconnects:
+            print(f"Camera {self.source}: giving up after {self.failed_attempts} attempts")
+            self._set_state("failed")
+            return
+        self.next_attempt = now + self._delay()
+
+    def health(self):
+        """State, time spent in each state (s) and reconnect counters"""
+        now = time.monotonic()
+        durations = dict(self.state_durations)
+        durations[self.state] += now - self.state_since
+        return {
+            "source": str(self.source),
+            "state": self.state,
+            "in_state_for": round(now - self.state_since, 1),
+            "time_in_state": {s: round(v, 1) for s, v in durations.items()},
+            "reconnects": self.reconnects,
+            "failed_attempts": self.failed_attempts,
+            "last_error": self.last_error
+        }
+
+    def interrupt(self):
+        """
+        Ask the reading thread to stop: safe from any thread. The capture is
+        released by the reader itself, on its next read_frame() or when the
+        read it is blocked in returns (within read_timeout for streams).
+        """
+        self.interrupted = True
+
+    def _release(self):
         if self.cap is not None:
             self.cap.release()
+            self.cap = None
         self.is_opened = False
-        cv2.destroyAllWindows()
+
+    def stop_camera(self):
+        """Stop and release camera; call from the reading thread or once it has exited"""
+        self._release()
+        self.stopped = True
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass  # headless OpenCV build (e.g. in a capture process)
         print("Camera stopped")
-    
+
     def get_frame_info(self):
         """Get frame width, height and FPS"""
         if not self.is_opened or self.cap is None:
             return 0, 0, 0
-            
+
         width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         fps = self.cap.get(cv2.CAP_PROP_FPS)
-        
-        return width, height, fps
\ No newline at end of file
+
+        return width, height, fps
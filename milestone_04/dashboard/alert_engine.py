@@ -0,0 +1,107 @@
+# dashboard/alert_engine.py
+from collections import deque
+from datetime import datetime
+import time
+
+
+class AlertEngine:
+    """
+    Evaluates zone counts once per update and keeps the alert state.
+    - per-zone thresholds, falling back to the global threshold
+    - hysteresis: an alert clears only once the count drops to
+      threshold - exit_margin, so it doesn't flap around the limit
+    - min_duration: the count must stay over the limit this many seconds
+      before the alert is raised
+    - every raise/clear is appended to a bounded event log
+    Times are epoch seconds of the frame being evaluated (media time for
+    recorded video), so durations follow the footage, not the wall clock.
+    A clock that jumps back more than clock_tolerance seconds (another
+    video, a media_start in the past) starts a new timeline: pending and
+    active alerts are cleared, as they are by reset() on a camera switch.
+    """
+
+    def __init__(self, global_threshold=20, exit_margin=2, min_duration=2.0, max_events=200,
+                 clock_tolerance=1.0):
+        self.global_threshold = global_threshold
+        self.zone_thresholds = {}
+        self.exit_margin = exit_margin
+        self.min_duration = min_duration
+        self.events = deque(maxlen=max_events)
+        self.new_events = []   # Events not yet handed to pop_new_events()
+        self.over_since = {}   # zone_id -> time the count first went over
+        self.active = {}       # zone_id -> time the alert was raised
+        self.clock_tolerance = clock_tolerance
+        self.last_now = None
+
+    def threshold_for(self, zone_id):
+        return self.zone_thresholds.get(zone_id, self.global_threshold)
+
+    def set_global_threshold(self, threshold):
+        self.global_threshold = int(threshold)
+
+    def set_zone_threshold(self, zone_id, threshold):
+        """threshold=None removes the override"""
+        if threshold is None:
+            self.zone_thresholds.pop(zone_id, None)
+        else:
+            self.zone_thresholds[zone_id] = int(threshold)
+
+    def update(self, zone_counts, now=None):
+        """Feed the latest counts, returns the tuple of zone ids currently in alert"""
+        now = time.time() if now is None else now
+        if self.last_now is not None and now < self.last_now - self.clock_tolerance:
+            self.reset(now)
+        self.last_now = max(now, self.last_now or now)
+
+        for zid, count in zone_counts.items():
+            limit = self.threshold_for(zid)
+
+            if zid in self.active:
+                if count <= limit - self.exit_margin:
+                    del self.active[zid]
+                    self.over_since.pop(zid, None)
+                    self._log("cleared", zid, count, limit, now)
+                continue
+
+            if count > limit:
+                since = self.over_since.setdefault(zid, now)
+                if now - since >= self.min_duration:
+                    self.active[zid] = now
+                    self._log("raised", zid, count, limit, now)
+            else:
+                self.over_since.pop(zid, None)
+
+        # Zones that disappeared (zones reloaded) can't stay in alert
+        for zid in [z for z in self.active if z not in zone_counts]:
+            del self.active[zid]
+            self._log("cleared", zid, 0, self.threshold_for(zid), now)
+
+        return tuple(sorted(self.active, key=str))
+
+    def reset(self, now=None):
+        """Forget pending and active alerts, e.g. when the camera changes"""
+        now = time.time() if now is None else now
+        for zid in list(self.active):
+            self._log("cleared", zid, None, self.threshold_for(zid), now)
+        self.active.clear()
+        self.over_since.clear()
+        self.last_now = None
+
+    def _log(self, event, zone_id, count, threshold, now):
+        entry = {
+            "time": datetime.fromtimestamp(now).strftime("%H:%M:%S"),
+            "ts": round(now, 3),
+            "event": event,
+            "zone": zone_id,
+            "count": count,
+            "threshold": threshold
+        }
+        self.events.append(entry)
+        self.new_events.append(entry)
+
+    def pop_new_events(self):
+        events, self.new_events = self.new_events, []
+        return events
+
+    def get_events(self, limit=20):
+        return list(self.events)[-limit:]
@@ -0,0 +1,193 @@
+# dashboard/alert_sinks.py
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+SINKS_FILE = "alert_sinks.json"
+
+
+class PermanentError(IOError):
+    """A send that retrying can't fix (e.g. HTTP 4xx): the batch is dropped"""
+
+
+class WebhookSink:
+    """POSTs each batch as a JSON array to an HTTP endpoint"""
+
+    def __init__(self, url, timeout=5.0, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json"}
+        self.headers.update(headers or {})
+
+    def send(self, batch):
+        body = json.dumps(batch, default=str).encode()
+        req = urllib.request.Request(self.url, data=body, headers=self.headers, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                if resp.status >= 300:
+                    raise IOError(f"Webhook {self.url} returned {resp.status}")
+        except urllib.error.HTTPError as e:
+            # Client errors won't change on retry, except timeouts and rate limits
+            if 400 <= e.code < 500 and e.code not in (408, 429):
+                raise PermanentError(f"Webhook {self.url} returned {e.code}") from e
+            raise
+
+    def __repr__(self):
+        return f"WebhookSink({self.url})"
+
+
+class JsonlSink:
+    """Appends one JSON object per line to a local file"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def send(self, batch):
+        with open(self.path, "a") as f:
+            for event in batch:
+                f.write(json.dumps(event, default=str) + "\n")
+
+    def __repr__(self):
+        return f"JsonlSink({self.path})"
+
+
+class EventDispatcher:
+    """
+    Delivers events to sinks, each from its own background thread and
+    queue, so a dead or slow sink only delays itself.
+    publish() never blocks: when a sink's bounded queue is full its oldest
+    event is dropped, so a slow receiver can't stall the frame loop.
+    Events are sent in batches and failed sends are retried with
+    exponential backoff and jitter; PermanentError (HTTP 4xx) is not retried.
+    """
+
+    def __init__(self, sinks, max_queue=1000, batch_size=50, flush_interval=1.0,
+                 max_retries=5, backoff=0.5, max_backoff=30.0):
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.queues = [queue.Queue(maxsize=max_queue) for _ in self.sinks]
+        # Totals over all sinks; per sink in sink_stats
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0, "failed": 0}
+        self.sink_stats = [{"delivered": 0, "dropped": 0, "failed": 0} for _ in self.sinks]
+        self.stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._run, args=(i,), name=f"alert-sink-{i}", daemon=True)
+                         for i in range(len(self.sinks))]
+        for thread in self._threads:
+            thread.start()
+
+    def _count(self, i, key, n):
+        with self.stats_lock:
+            self.stats[key] += n
+            self.sink_stats[i][key] += n
+
+    def publish(self, event):
+        with self.stats_lock:
+            self.stats["published"] += 1
+        for i, q in enumerate(self.queues):
+            while True:
+                try:
+                    q.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                        self._count(i, "dropped", 1)
+                    except queue.Empty:
+                        pass
+
+    def depth(self):
+        """Events waiting in the fullest sink queue"""
+        return max((q.qsize() for q in self.queues), default=0)
+
+    def _next_batch(self, q):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _send_with_retry(self, sink, batch):
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                sink.send(batch)
+                return True
+            except PermanentError as e:
+                print(f"Alert sink {sink!r} rejected a batch, not retrying: {e}")
+                return False
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Alert sink {sink!r} gave up after {attempt + 1} attempts: {e}")
+                    return False
+                # Wake up early on stop() so shutdown isn't held by the backoff
+                if self._stop.wait(delay * (0.5 + random.random())):
+                    return False
+                delay = min(delay * 2, self.max_backoff)
+
+    def _run(self, i):
+        sink, q = self.sinks[i], self.queues[i]
+        while not self._stop.is_set() or not q.empty():
+            batch = self._next_batch(q)
+            if not batch:
+                continue
+            if self._send_with_retry(sink, batch):
+                self._count(i, "delivered", len(batch))
+            else:
+                self._count(i, "failed", len(batch))
+
+    def stop(self, timeout=5.0):
+        """Flush what is queued (waiting at most timeout seconds overall), then stop the workers"""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+
+def load_dispatcher(config_file=SINKS_FILE):
+    """
+    Build an EventDispatcher from alert_sinks.json, e.g.
+      {"webhooks": [{"url": "http://host/hook", "headers": {...}}],
+       "jsonl": ["dashboard/exports/alerts.jsonl"],
+       "batch_size": 50, "flush_interval": 1.0, "max_retries": 5}
+    Returns None when the file doesn't exist or configures no sinks.
+    """
+    if not os.path.exists(config_file):
+        return None
+    try:
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+    except Exception as e:
+        print(f"Error loading {config_file}: {e}")
+        return None
+
+    sinks = []
+    for hook in config.get("webhooks", []):
+        if isinstance(hook, str):
+            hook = {"url": hook}
+        sinks.append(WebhookSink(hook["url"], timeout=hook.get("timeout", 5.0), headers=hook.get("headers")))
+    for path in config.get("jsonl", []):
+        sinks.append(JsonlSink(path))
+    if not sinks:
+        return None
+
+    options = {k: config[k] for k in ("max_queue", "batch_size", "flush_interval", "max_retries", "backoff")
+               if k in config}
+    print(f"Alert sinks: {sinks}")
+    return EventDispatcher(sinks, **options)
@@ -1,58 +1,226 @@
 # dashboard/data_manager.py
+from collections import deque, namedtuple
 from datetime import datetime
 import os
+import threading
+import time
 import pandas as pd
 import numpy as np
+from dashboard.alert_engine import AlertEngine
+
+# Immutable view of the pipeline state. The processing thread builds a new
+# one per update and swaps it in with a single attribute assignment, so
+# Flask threads always see a consistent set of values without locking.
+Snapshot = namedtuple("Snapshot", ["seq", "total", "zones", "occupancy", "dwell", "lines", "alerts",
+                                   "alert_events", "history", "threshold", "zone_thresholds", "frame",
+                                   "windows"])
+
+HISTORY_LIMIT = 500
+
+
+def line_alert_counts(lines):
+    """Flatten line counts to alert keys 'line_id:in' / 'line_id:out'"""
+    counts = {}
+    for lid, c in lines.items():
+        counts[f"{lid}:in"] = c.get("in", 0)
+        counts[f"{lid}:out"] = c.get("out", 0)
+    return counts
+
 
 class DataManager:
     _instance = None
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance.initialize()
         return cls._instance
-    
+
     def initialize(self):
-        self.zone_counts = {}
-        self.total_count = 0
-        self.history = []
         self.global_threshold = 20  # Default same limit for all zones
         self.heatmap = None
-        self.current_frame = None
         self.export_dir = "dashboard/exports"
         os.makedirs(self.export_dir, exist_ok=True)
-    
-    def update_counts(self, zone_counts_dict, total):
-        self.zone_counts = zone_counts_dict.copy()
-        self.total_count = total
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        entry = {"time": timestamp, "total": total, "zones": zone_counts_dict.copy()}
-        self.history.append(entry)
-        if len(self.history) > 500:
-            self.history.pop(0)
-    
+        # Writer-side state, only touched under _write_lock
+        self._history = deque(maxlen=HISTORY_LIMIT)
+        self._write_lock = threading.Lock()
+        self.alert_engine = AlertEngine(global_threshold=self.global_threshold)
+        self._file_thresholds = {}  # per-zone limits from zones.json
+        self._api_thresholds = {}   # per-zone limits set through the API, override the file
+        # What zone thresholds compare against: "occupancy" (people inside now, so
+        # alerts clear when the zone empties) or "entries" (unique entries so far,
+        # which only grow, so alerts clear only when the counter's window rolls over)
+        self.alert_source = "occupancy"
+        # Line alerts compare crossings in the last line_alert_window seconds with
+        # the line's own threshold; lines without one never alert
+        self.line_alert_window = 60.0
+        self._line_samples = deque()  # (ts, {alert key: cumulative crossings})
+        # Optional alert_sinks.EventDispatcher, see set_dispatcher()
+        self.dispatcher = None
+        self.count_event_interval = 5.0
+        self._last_count_event = 0.0
+        self.snapshot = Snapshot(seq=0, total=0, zones={}, occupancy={}, dwell={}, lines={}, alerts=(), alert_events=(), history=(),
+                                 threshold=self.global_threshold, zone_thresholds={}, frame=None, windows=None)
+
+    # Read-only views of the latest snapshot
+    @property
+    def zone_counts(self):
+        return self.snapshot.zones
+
+    @property
+    def total_count(self):
+        return self.snapshot.total
+
+    @property
+    def history(self):
+        return self.snapshot.history
+
+    @property
+    def current_frame(self):
+        return self.snapshot.frame
+
+    @property
+    def version(self):
+        return self.snapshot.seq
+
+    def _publish(self, **changes):
+        """Build the next snapshot from the current one. Caller holds _write_lock."""
+        snap = self.snapshot
+        self.snapshot = snap._replace(seq=snap.seq + 1, **changes)
+
+    def update_counts(self, zone_counts_dict, total, occupancy=None, dwell=None, lines=None, timestamp=None,
+                      windows=None):
+        """
+        occupancy: {zone_id: people inside now}
+        dwell: {zone_id: dwell stats dict from ZoneCounter.get_dwell_stats()}
+        lines: {line_id: {"in": n, "out": m}} from LineCounter.get_counts()
+        timestamp: epoch seconds of the frame (CameraFeed.frame_time), now if None.
+          History entries keep it as "ts"; "time" is only the display label.
+        windows: ZoneCounter.get_windows(), the rolling window counts if any
+        """
+        zones = dict(zone_counts_dict)
+        occupancy = dict(occupancy or {})
+        dwell = dict(dwell or {})
+        lines = {lid: dict(c) for lid, c in (lines or {}).items()}
+        ts = time.time() if timestamp is None else timestamp
+        label = datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+        entry = {"time": label, "ts": round(ts, 3), "total": total, "zones": dict(zones)}
+        if occupancy:
+            entry["occupancy"] = dict(occupancy)
+        if dwell:
+            entry["dwell"] = {zid: d["mean"] for zid, d in dwell.items()}
+        if lines:
+            entry["lines"] = {lid: dict(c) for lid, c in lines.items()}
+        with self._write_lock:
+            self._history.append(entry)
+            zone_values = occupancy if self.alert_source == "occupancy" and occupancy else zones
+            alerts = self.alert_engine.update(dict(zone_values, **self._line_rates(lines, ts)), now=ts)
+            new_events = self.alert_engine.pop_new_events()
+            self._publish(zones=zones, total=total, occupancy=occupancy, dwell=dwell, lines=lines, windows=windows,
+                          history=tuple(self._history), alerts=alerts,
+                          alert_events=tuple(self.alert_engine.get_events()))
+
+        if self.dispatcher is not None:
+            for event in new_events:
+                self.dispatcher.publish(dict(event, type="alert"))
+            now = time.monotonic()
+            if now - self._last_count_event >= self.count_event_interval:
+                self._last_count_event = now
+                self.dispatcher.publish({"type": "counts", "time": label, "ts": entry["ts"], "total": total,
+                                         "zones": zones, "alerts": list(alerts)})
+
+    def _line_rates(self, lines, ts):
+        """Crossings per line direction within the last line_alert_window seconds. Caller holds _write_lock."""
+        current = line_alert_counts(lines)
+        samples = self._line_samples
+        if samples and (ts < samples[-1][0] or any(current.get(k, 0) < v for k, v in samples[-1][1].items())):
+            samples.clear()  # clock went backwards or the counters were reset
+        samples.append((ts, current))
+        while len(samples) > 1 and samples[1][0] <= ts - self.line_alert_window:
+            samples.popleft()
+        base = samples[0][1]
+        thresholds = self.alert_engine.zone_thresholds
+        return {key: count - base.get(key, 0) for key, count in current.items() if key in thresholds}
+
+    def reset_timeline(self):
+        """New camera: clear alert state and line rate samples that belong to the old timeline"""
+        with self._write_lock:
+            self.alert_engine.reset()
+            self._line_samples.clear()
+            new_events = self.alert_engine.pop_new_events()
+            self._publish(alerts=(), alert_events=tuple(self.alert_engine.get_events()))
+        if self.dispatcher is not None:
+            for event in new_events:
+                self.dispatcher.publish(dict(event, type="alert"))
+
+    def set_dispatcher(self, dispatcher, count_event_interval=5.0):
+        """Forward alert events, and counts every count_event_interval seconds, to a dispatcher"""
+        self.dispatcher = dispatcher
+        self.count_event_interval = count_event_interval
+
+    def update_frame(self, jpeg_bytes):
+        with self._write_lock:
+            self._publish(frame=jpeg_bytes)
+
     def update_heatmap(self, heatmap_frame):
         self.heatmap = heatmap_frame.copy()
-    
+
     def set_global_threshold(self, threshold):
         self.global_threshold = int(threshold)
-    
+        with self._write_lock:
+            self.alert_engine.set_global_threshold(self.global_threshold)
+            self._publish(threshold=self.global_threshold)
+
+    def _apply_zone_thresholds(self):
+        """zones.json limits with the API overrides on top. Caller holds _write_lock."""
+        self.alert_engine.zone_thresholds = {**self._file_thresholds, **self._api_thresholds}
+        self._publish(zone_thresholds=dict(self.alert_engine.zone_thresholds))
+
+    def replace_zone_thresholds(self, thresholds):
+        """
+        Set the per-zone limits from zones.json (reload), dropping file limits
+        no longer listed. Limits set through set_zone_threshold() still win.
+        """
+        with self._write_lock:
+            self._file_thresholds = {zid: int(t) for zid, t in thresholds.items()}
+            self._apply_zone_thresholds()
+
+    def set_zone_threshold(self, zone_id, threshold):
+        """
+        Per-zone limit that survives zone reloads; threshold=None removes it,
+        so the zones.json limit, or else the global one, applies again.
+        """
+        with self._write_lock:
+            if threshold is None:
+                self._api_thresholds.pop(zone_id, None)
+            else:
+                self._api_thresholds[zone_id] = int(threshold)
+            self._apply_zone_thresholds()
+
     def get_data(self):
-        alerts = [zid for zid, count in self.zone_counts.items() if count > self.global_threshold]
+        snap = self.snapshot
         return {
-            "total": self.total_count,
-            "zones": self.zone_counts,
-            "history": self.history[-50:],
-            "threshold": self.global_threshold,
-            "alerts": alerts
+            "seq": snap.seq,
+            "total": snap.total,
+            "zones": snap.zones,
+            "occupancy": snap.occupancy,
+            "dwell": snap.dwell,
+            "lines": snap.lines,
+            "history": list(snap.history[-50:]),
+            "threshold": snap.threshold,
+            "zone_thresholds": snap.zone_thresholds,
+            "alerts": list(snap.alerts),
+            "alert_events": list(snap.alert_events),
+            "windows": snap.windows
         }
-    
-    def export_csv(self):
-        if not self.history:
+
+    def export_csv(self, history=None, filepath=None):
+        history = self.snapshot.history if history is None else history
+        if not history:
             return None
-        df = pd.DataFrame(self.history)
-        filename = f"crowd_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        filepath = os.path.join(self.export_dir, filename)
+        df = pd.DataFrame(list(history))
+        if filepath is None:
+            filename = f"crowd_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            filepath = os.path.join(self.export_dir, filename)
         df.to_csv(filepath, index=False)
-        return filepath
\ No newline at end of file
+        return filepath
@@ -15,12 +15,29 @@ function updateDashboard(data) {
     const zoneIds = Object.keys(data.zones || {}).sort((a, b) => a - b);
     zoneIds.forEach((id, i) => {
         const count = data.zones[id] || 0;
+        const limit = (data.zone_thresholds || {})[id] ?? data.threshold;
         const div = document.createElement('div');
         div.className = 'col-md-3 mb-4';
         div.innerHTML = `
             <div class="zone-box ${colors[i % 4]} shadow-lg">
                 <h4>Zone ${id} Count</h4>
                 <h2>${count.toString().padStart(2, '0')}</h2>
+                <small>Inside now: ${(data.occupancy || {})[id] ?? 0}
+                    | Avg dwell: ${((data.dwell || {})[id] || {}).mean ?? 0}s
+                    | Limit: ${limit}</small>
+            </div>`;
+        container.appendChild(div);
+    });
+
+    // Tripwire line in/out counts
+    Object.keys(data.lines || {}).forEach(id => {
+        const c = data.lines[id];
+        const div = document.createElement('div');
+        div.className = 'col-md-3 mb-4';
+        div.innerHTML = `
+            <div class="zone-box line-box shadow-lg">
+                <h4>Line ${id}</h4>
+                <h2>In ${c.in} / Out ${c.out}</h2>
             </div>`;
         container.appendChild(div);
     });
@@ -84,13 +101,25 @@ function updateDashboard(data) {
         }
     });
 
+    // Camera health
+    const health = data.camera;
+    const healthEl = document.getElementById('camera-health');
+    if (health) {
+        const times = Object.entries(health.time_in_state || {})
+            .filter(([, secs]) => secs > 0)
+            .map(([state, secs]) => `${state} ${secs}s`).join(', ');
+        healthEl.innerText = `Camera ${health.source}: ${health.state.toUpperCase()} for ${health.in_state_for}s`
+            + ` | reconnects: ${health.reconnects ?? 0} | ${times}`;
+        healthEl.className = health.state === 'live' ? 'text-success' : 'text-danger';
+    }
+
     // Alert system
     const alerts = data.alerts || [];
     const alertBox = document.getElementById('alert-box');
     const alertZones = document.getElementById('alert-zones');
 
     if (alerts.length > 0) {
-        alertZones.textContent = alerts.map(z => `Zone ${z}`).join(', ');
+        alertZones.textContent = alerts.map(z => String(z).includes(':') ? `Line ${z}` : `Zone ${z}`).join(', ');
         alertBox.classList.remove('d-none');
         // Play beep only on new alert
         if (JSON.stringify(alerts.sort()) !== JSON.stringify(lastAlerts.sort())) {
@@ -113,20 +142,29 @@ setInterval(() => {
 // Admin Functions
 function setThreshold() {
     const val = parseInt(document.getElementById('global-threshold').value) || 20;
+    const zoneInput = document.getElementById('threshold-zone');
+    const zone = zoneInput ? zoneInput.value.trim() : '';
     fetch('/set_threshold', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ threshold: val })
+        body: JSON.stringify(zone ? { threshold: val, zone: zone } : { threshold: val })
     }).then(() => alert('Threshold updated!'));
 }
 
 function changeCamera() {
     const src = document.getElementById('camera-source').value.trim();
+    const trackerKind = document.getElementById('tracker-kind').value;
     fetch('/admin/change_camera', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ source: src || 0 })
-    }).then(() => alert('Camera source updated!'));
+        body: JSON.stringify({
+            source: src || '0',
+            tracker: trackerKind || undefined,
+            loop: document.getElementById('camera-loop').checked
+        })
+    })
+        .then(r => r.json())
+        .then(d => alert(d.error ? d.error : 'Camera source updated!'));
 }
 
 function viewUsers() {
@@ -142,27 +180,35 @@ function viewUsers() {
         });
 }
 
-function exportPDF() {
-    fetch('/export_pdf')
+// Exports run as background jobs: submit, poll status, then download
+function runExport(url) {
+    fetch(url)
         .then(r => r.json())
         .then(d => {
-            if (d.filename) {
-                window.location = `/download/${d.filename}`;
-            } else {
+            if (!d.job_id) {
                 alert("No data to export");
+                return;
             }
+            pollExport(d.job_id);
         });
 }
 
-document.getElementById('export-btn').onclick = () => {
-    fetch('/export_csv')
+function pollExport(jobId) {
+    fetch(`/export_status/${jobId}`)
         .then(r => r.json())
-        .then(d => {
-            if (d.filename) {
-                window.location = `/download/${d.filename}`;
+        .then(job => {
+            if (job.status === 'done') {
+                window.location = `/download/${job.filename}`;
+            } else if (job.status === 'failed' || job.error) {
+                alert("Export failed: " + (job.error || 'unknown error'));
+            } else {
+                setTimeout(() => pollExport(jobId), 500);
             }
         });
-};
-
+}
 
+function exportPDF() {
+    runExport('/export_pdf');
+}
 
+document.getElementById('export-btn').onclick = () => runExport('/export_csv');
@@ -1,36 +1,222 @@
 # detection/counter.py
+from collections import deque
+from datetime import datetime
+import time
 import cv2
 import numpy as np
 
+from detection.structs import TRACK_BITS, TRACK_MASK, as_tracks, member
+from detection.zone_index import ZoneGridIndex
+
+WINDOWS = {"hourly": "%Y-%m-%d %H:00", "daily": "%Y-%m-%d"}
+
+# Dwell-time histogram bin edges in seconds (last bin is open-ended)
+DWELL_BINS = np.array([0, 5, 10, 30, 60, 120, 300, 600, 1800], dtype=np.float64)
+
+
 class ZoneCounter:
-    def __init__(self, zones):
+    """
+    Counts distinct tracks entering each zone.
+    Seen (zone, track) pairs are kept as packed int64 keys in one sorted
+    array with a last-seen time; pairs not seen for ttl seconds are
+    evicted, so memory is bounded by the number of recently active tracks.
+    With window="hourly" or "daily" the counts roll over at each boundary
+    and the finished windows are kept in window_history.
+
+    Live occupancy and dwell time are tracked alongside: the pairs
+    currently inside carry their entry time, and a track that has not
+    been inside for exit_grace seconds closes its visit into the zone's
+    dwell histogram (DWELL_BINS).
+
+    Zone polygons are compiled once and indexed in a ZoneGridIndex, so a
+    track is only tested against the zones whose cells it falls in. All
+    per-frame bookkeeping works on the packed arrays, so its cost depends
+    on the number of tracks, not the number of zones.
+    """
+
+    def __init__(self, zones, ttl=300.0, window=None, max_windows=48, exit_grace=1.0, cell_size=64):
+        if window is not None and window not in WINDOWS:
+            raise ValueError(f"window must be one of {sorted(WINDOWS)} or None")
         self.zones = zones
-        self.counted_ids = {zone['id']: set() for zone in zones}
-        self.current_counts = {zone['id']: 0 for zone in zones}
+        self.zone_ids = [zone['id'] for zone in zones]
+        self.ttl = ttl
+        self.window = window
+        self.window_history = deque(maxlen=max_windows)
+        self.exit_grace = exit_grace
+        self.polygons = [np.array(zone['points'], np.int32).reshape(-1, 2) for zone in zones]
+        self.index = ZoneGridIndex(self.polygons, cell_size=cell_size)
+        self.reset()
 
     def point_in_polygon(self, point, polygon):
-        return cv2.pointPolygonTest(np.array(polygon, np.int32), point, False) >= 0
+        return cv2.pointPolygonTest(np.asarray(polygon, np.int32), point, False) >= 0
+
+    def _window_key(self, now):
+        if self.window is None:
+            return None
+        return datetime.fromtimestamp(now).strftime(WINDOWS[self.window])
+
+    def _roll_window(self, now):
+        key = self._window_key(now)
+        if key == self.window_key:
+            return
+        if self.window_key is not None:
+            self.window_history.append({"window": self.window_key, "zones": self.get_counts()})
+        self.window_key = key
+        self._clear()
+
+    def update(self, tracks, now=None):
+        now = time.time() if now is None else now
+        self._roll_window(now)
+
+        tracks = as_tracks(tracks)
+        keys = []
+        # Bottom-centre anchors, one list conversion for the whole frame
+        for centroid, tk in zip(map(tuple, tracks["anchor"].astype(np.int32).tolist()), tracks["id"].tolist()):
+            hits = [zi for zi in self.index.query(centroid) if self.point_in_polygon(centroid, self.polygons[zi])]
+            if hits:
+                keys.extend((zi << TRACK_BITS) | tk for zi in hits)
+
+        keys = np.unique(np.array(keys, dtype=np.int64))
+        self._mark_seen(keys, now)
+        self._update_presence(keys, now)
+        if now >= self._next_evict:
+            self._evict(now)
+            self._next_evict = now + 1.0  # TTL sweeps once per second are plenty
 
-    def update(self, tracks):
-        current_in_zone = {zone['id']: set() for zone in self.zones}
+    def _mark_seen(self, keys, now):
+        """Refresh last-seen for known pairs, count and insert the new ones"""
+        known, pos = member(self.seen_keys, keys)
+        self.seen_time[pos[known]] = now
 
-        for ltrb, track_id, _ in tracks:
-            left, top, right, bottom = map(int, ltrb)
-            centroid = ((left + right) // 2, bottom)
+        new = keys[~known]
+        if len(new):
+            self.counts += np.bincount(new >> TRACK_BITS, minlength=len(self.zones))
+            keys_all = np.concatenate([self.seen_keys, new])
+            order = np.argsort(keys_all, kind='stable')
+            self.seen_keys = keys_all[order]
+            self.seen_time = np.concatenate([self.seen_time, np.full(len(new), now)])[order]
 
-            for zone in self.zones:
-                if self.point_in_polygon(centroid, zone['points']):
-                    current_in_zone[zone['id']].add(track_id)
-                    if track_id not in self.counted_ids[zone['id']]:
-                        self.counted_ids[zone['id']].add(track_id)
-                        self.current_counts[zone['id']] += 1
+    def _update_presence(self, keys, now):
+        """Occupancy and dwell bookkeeping, O(pairs inside)"""
+        self.occupancy = np.bincount(keys >> TRACK_BITS, minlength=len(self.zones))
+        inside, entered, last_in = self.inside_keys, self.entered_at, self.last_in
+
+        if len(inside):
+            present, _ = member(keys, inside)
+            last_in[present] = now
+            gone = ~present & (now - last_in > self.exit_grace)
+            if gone.any():
+                zi = inside[gone] >> TRACK_BITS
+                dwell = last_in[gone] - entered[gone]
+                bins = np.searchsorted(DWELL_BINS, dwell, side='right') - 1
+                np.add.at(self.dwell_hist, (zi, bins), 1)
+                np.add.at(self.dwell_total, zi, dwell)
+                self.dwell_visits += np.bincount(zi, minlength=len(self.zones))
+                keep = ~gone
+                inside, entered, last_in = inside[keep], entered[keep], last_in[keep]
+
+        known, _ = member(inside, keys)
+        new = keys[~known]
+        if len(new):
+            inside = np.concatenate([inside, new])
+            order = np.argsort(inside, kind='stable')
+            inside = inside[order]
+            entered = np.concatenate([entered, np.full(len(new), now)])[order]
+            last_in = np.concatenate([last_in, np.full(len(new), now)])[order]
+
+        self.inside_keys, self.entered_at, self.last_in = inside, entered, last_in
+
+    def _evict(self, now):
+        if self.ttl is None or not len(self.seen_time):
+            return
+        keep = self.seen_time >= now - self.ttl
+        if not keep.all():
+            self.seen_keys = self.seen_keys[keep]
+            self.seen_time = self.seen_time[keep]
+
+    def tracked_ids(self):
+        """Number of (zone, track) pairs currently held"""
+        return len(self.seen_keys)
 
     def get_counts(self):
-        return self.current_counts.copy()
+        return dict(zip(self.zone_ids, self.counts.tolist()))
+
+    def get_windows(self):
+        """Current window and the finished ones with their counts, or None without a window"""
+        if self.window is None:
+            return None
+        return {"window": self.window, "current": self.window_key, "history": list(self.window_history)}
+
+    def get_occupancy(self):
+        """People inside each zone in the latest frame"""
+        return dict(zip(self.zone_ids, self.occupancy.tolist()))
+
+    def get_dwell_stats(self, now=None):
+        """Per zone: finished visits, mean dwell (s), histogram counts and current dwell of those inside"""
+        now = time.time() if now is None else now
+        inside_max = np.zeros(len(self.zones))
+        if len(self.inside_keys):
+            np.maximum.at(inside_max, self.inside_keys >> TRACK_BITS, now - self.entered_at)
+        means = np.divide(self.dwell_total, self.dwell_visits,
+                          out=np.zeros(len(self.zones)), where=self.dwell_visits > 0)
+        hists = self.dwell_hist.tolist()
+        return {
+            zid: {
+                "visits": visits,
+                "mean": round(mean, 1),
+                "histogram": hist,
+                "inside_max": round(current, 1)
+            }
+            for zid, visits, mean, hist, current in zip(self.zone_ids, self.dwell_visits.tolist(),
+                                                        means.tolist(), hists, inside_max.tolist())
+        }
+
+    def adopt_state(self, old):
+        """
+        Carry counts, track state and dwell stats over from another counter
+        for every zone whose id and points are unchanged. Used when zones
+        are reloaded; zones that changed start from zero.
+        """
+        old_index = {(z['id'], str(z['points'])): i for i, z in enumerate(old.zones)}
+        remap = np.full(len(old.zones), -1, dtype=np.int64)
+        for ni, zone in enumerate(self.zones):
+            oi = old_index.get((zone['id'], str(zone['points'])))
+            if oi is not None:
+                remap[oi] = ni
+        kept = np.flatnonzero(remap >= 0)
+
+        def move(keys, *values):
+            new_zi = remap[keys >> TRACK_BITS] if len(keys) else np.empty(0, dtype=np.int64)
+            keep = new_zi >= 0
+            keys = (new_zi[keep] << TRACK_BITS) | (keys[keep] & TRACK_MASK)
+            order = np.argsort(keys, kind='stable')
+            return [keys[order]] + [v[keep][order] for v in values]
+
+        self.seen_keys, self.seen_time = move(old.seen_keys, old.seen_time)
+        self.inside_keys, self.entered_at, self.last_in = move(old.inside_keys, old.entered_at, old.last_in)
+        for name in ("counts", "occupancy", "dwell_hist", "dwell_total", "dwell_visits"):
+            getattr(self, name)[remap[kept]] = getattr(old, name)[kept]
+        self.window_key = old.window_key
+        self.window_history = old.window_history
+        self._next_evict = old._next_evict
+
+    def _clear(self):
+        self.seen_keys = np.empty(0, dtype=np.int64)
+        self.seen_time = np.empty(0, dtype=np.float64)
+        self.counts = np.zeros(len(self.zones), dtype=np.int64)
 
     def reset(self):
-        self.counted_ids = {zone['id']: set() for zone in self.zones}
-        self.current_counts = {zone['id']: 0 for zone in self.zones}
+        self.window_key = None
+        self._next_evict = 0.0
+        self._clear()
+        n = len(self.zones)
+        self.occupancy = np.zeros(n, dtype=np.int64)
+        self.inside_keys = np.empty(0, dtype=np.int64)
+        self.entered_at = np.empty(0, dtype=np.float64)
+        self.last_in = np.empty(0, dtype=np.float64)
+        self.dwell_hist = np.zeros((n, len(DWELL_BINS)), dtype=np.int64)
+        self.dwell_total = np.zeros(n, dtype=np.float64)
+        self.dwell_visits = np.zeros(n, dtype=np.int64)
 
     def update_heatmap(self, frame, tracks):
         height, width = frame.shape[:2]
@@ -40,10 +226,8 @@ class ZoneCounter:
             overlay = cv2.addWeighted(frame, 0.9, np.full_like(frame, 40), 0.1, 0)
             return overlay
 
-        for ltrb, _, _ in tracks:
-            left, top, right, bottom = map(int, ltrb)
-            cx, cy = (left + right) // 2, bottom
-            cv2.circle(heat, (cx, cy), 35, 1.0, -1)
+        for anchor in as_tracks(tracks)["anchor"].astype(np.int32).tolist():
+            cv2.circle(heat, tuple(anchor), 35, 1.0, -1)
 
         heat = cv2.GaussianBlur(heat, (91, 91), 0)
 
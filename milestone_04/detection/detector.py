@@ -1,7 +1,10 @@
 # detection/detector.py
 from ultralytics import YOLO
+import numpy as np
 import torch
 
+from detection.structs import DETECTION_DTYPE
+
 class YOLODetector:
     def __init__(self, model_name="yolov8n.pt", conf_threshold=0.5):
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
@@ -12,13 +15,15 @@ class YOLODetector:
 
     def detect(self, frame):
         """
-        Returns list of detections: [x1, y1, x2, y2, confidence, class_id]
+        Returns a DETECTION_DTYPE array (box, conf, cls)
         Only person class (class 0)
         """
         results = self.model(frame, conf=self.conf_threshold, classes=[0], verbose=False)[0]
-        detections = []
-        for box in results.boxes:
-            xyxy = box.xyxy[0].cpu().numpy()
-            conf = float(box.conf[0])
-            detections.append(list(xyxy) + [conf, 0])  # [x1,y1,x2,y2,conf,class]
-        return detections
\ No newline at end of file
+        boxes = results.boxes
+        detections = np.empty(len(boxes), DETECTION_DTYPE)
+        if len(boxes):
+            # Whole columns off the device at once, not box by box
+            detections["box"] = boxes.xyxy.cpu().numpy()
+            detections["conf"] = boxes.conf.cpu().numpy()
+            detections["cls"] = boxes.cls.cpu().numpy()
+        return detections
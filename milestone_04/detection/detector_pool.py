@@ -0,0 +1,291 @@
+# detection/detector_pool.py
+import functools
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from shared_camera import attach_shared_memory
+
+# Model loaded by the parent before forking, inherited copy-on-write by workers
+_preloaded = None
+
+
+def _load_yolo(model_name, conf_threshold):
+    from detection.detector import YOLODetector
+    return YOLODetector(model_name=model_name, conf_threshold=conf_threshold)
+
+
+def _cuda_initialized():
+    torch = sys.modules.get("torch")
+    return torch is not None and torch.cuda.is_initialized()
+
+
+def _pool_worker(factory, threads, cpus, inbox_name, conn):
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+    detector = _preloaded if _preloaded is not None else factory()
+    inbox = attach_shared_memory(inbox_name)
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            job_id, shape, dtype = msg
+            frame = np.ndarray(shape, dtype=dtype, buffer=inbox.buf)
+            t0 = time.perf_counter()
+            try:
+                detections = detector.detect(frame)
+                conn.send((job_id, detections, None, time.perf_counter() - t0))
+            except Exception as e:
+                conn.send((job_id, None, str(e), time.perf_counter() - t0))
+            del frame
+    finally:
+        inbox.close()
+
+
+class DetectorPool:
+    """
+    N detector processes behind the YOLODetector interface.
+    The model is loaded once in this process and the workers are forked
+    from it, so weights are shared copy-on-write (on platforms without
+    fork each worker loads its own copy). Each worker pins its torch
+    intra-op threads and optionally a CPU set. Frames go through a
+    per-worker shared memory inbox; only detections come back, over the
+    worker's own pipe, so a worker killed mid-send can't corrupt a channel
+    the others share.
+
+    detect() is thread-safe and blocking, so every camera loop can call it
+    and frames from all cameras are spread over whichever workers are idle.
+    Create the pool before running any inference in this process: forking
+    after torch has started its thread pool can hang the children. CUDA
+    can't be used across fork at all, so a model that initialises it is
+    refused in fork mode; pass start_method="spawn" on GPU hosts.
+
+    A worker that dies fails the frames it was working on and is replaced
+    by a fresh process, which loads its own copy of the model. Replacements
+    are always spawned: by then this process runs the collector and the
+    callers' threads, whose locks a forked child could inherit held.
+    """
+
+    def __init__(self, workers=2, model_name="yolov8n.pt", conf_threshold=0.5,
+                 threads_per_worker=1, pin_cpus=False, max_frame_bytes=1920 * 1080 * 3,
+                 detector_factory=None, start_method=None):
+        global _preloaded
+        self.workers = workers
+        self.max_frame_bytes = max_frame_bytes
+        self.threads_per_worker = threads_per_worker
+        self.factory = detector_factory or functools.partial(_load_yolo, model_name, conf_threshold)
+
+        if start_method is None:
+            start_method = "fork" if "fork" in mp.get_all_start_methods() else "spawn"
+        self.ctx = mp.get_context(start_method)
+        if start_method == "fork":
+            if _cuda_initialized():
+                raise RuntimeError("CUDA is already initialised in this process, "
+                                   "use DetectorPool(start_method='spawn')")
+            _preloaded = self.factory()
+            if _cuda_initialized():
+                _preloaded = None
+                raise RuntimeError("The detector uses CUDA, which forked workers can't share; "
+                                   "use DetectorPool(start_method='spawn')")
+
+        self.cpu_sets = self._cpu_sets(workers, threads_per_worker) if pin_cpus else [None] * workers
+        self.inboxes = [shared_memory.SharedMemory(create=True, size=max_frame_bytes) for _ in range(workers)]
+        self.conns, self.processes = [None] * workers, [None] * workers
+        for i in range(workers):
+            self._start_worker(i)
+        _preloaded = None  # the parent doesn't run inference itself
+        self.restarts = 0
+
+        self._cond = threading.Condition()
+        self._idle = list(range(workers))
+        self._pending = {}  # job_id -> (worker index, Future)
+        self._next_job = 0
+        self._closed = False
+        self.frames = [0] * workers
+        self.busy_seconds = [0.0] * workers
+        self.errors = 0
+        self.started_at = time.monotonic()
+
+        self._collector = threading.Thread(target=self._collect, name="detector-pool-results", daemon=True)
+        self._collector.start()
+        print(f"Detector pool started: {workers} workers x {threads_per_worker} threads")
+
+    def _start_worker(self, i, ctx=None):
+        ctx = ctx or self.ctx
+        conn, child_conn = ctx.Pipe()
+        p = ctx.Process(
+            target=_pool_worker,
+            args=(self.factory, self.threads_per_worker, self.cpu_sets[i], self.inboxes[i].name, child_conn),
+            name=f"detector-{i}",
+            daemon=True
+        )
+        p.start()
+        child_conn.close()
+        self.conns[i] = conn
+        self.processes[i] = p
+
+    @staticmethod
+    def _cpu_sets(workers, threads):
+        """Disjoint CPU sets of `threads` cores per worker, wrapping if there are too few"""
+        if not hasattr(os, "sched_getaffinity"):
+            return [None] * workers
+        cpus = sorted(os.sched_getaffinity(0))
+        return [{cpus[(i * threads + t) % len(cpus)] for t in range(threads)} for i in range(workers)]
+
+    def submit(self, frame):
+        """Queue a frame on the next idle worker, returns a Future of its detections"""
+        frame = np.ascontiguousarray(frame)
+        if frame.nbytes > self.max_frame_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes exceeds max_frame_bytes={self.max_frame_bytes}")
+        future = Future()
+        with self._cond:
+            while not self._idle and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError("Detector pool is shut down")
+            worker = self._idle.pop()
+            conn = self.conns[worker]
+            job_id = self._next_job
+            self._next_job += 1
+            self._pending[job_id] = (worker, future)
+        # This worker is ours until its result comes back
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=self.inboxes[worker].buf)[...] = frame
+        try:
+            conn.send((job_id, frame.shape, frame.dtype.str))
+        except OSError:
+            # The worker died; the collector restarts it and puts it back on the idle list
+            with self._cond:
+                failed = self._pending.pop(job_id, None) is not None
+            if failed:  # else the collector already failed it
+                self.errors += 1
+                future.set_exception(RuntimeError(f"detector-{worker} exited"))
+        return future
+
+    def depth(self):
+        """Frames submitted and not finished yet"""
+        with self._cond:
+            return len(self._pending)
+
+    def detect(self, frame):
+        """Same contract as YOLODetector.detect()"""
+        return self.submit(frame).result()
+
+    def _collect(self):
+        while not self._closed:
+            # A worker's sentinel becomes ready when it exits
+            owners = {}
+            for i, (conn, p) in enumerate(zip(self.conns, self.processes)):
+                owners[conn] = owners[p.sentinel] = i
+            dead = set()
+            for ready in wait(list(owners), timeout=1.0):
+                worker = owners[ready]
+                if ready is not self.conns[worker]:
+                    dead.add(worker)
+                    continue
+                try:
+                    result = ready.recv()
+                except (EOFError, OSError):
+                    dead.add(worker)
+                    continue
+                self._finish(worker, *result)
+            if dead and not self._closed:
+                self._replace_dead_workers(dead)
+
+    def _finish(self, worker, job_id, detections, error, elapsed):
+        with self._cond:
+            _, future = self._pending.pop(job_id, (None, None))
+            if future is None:
+                return  # failed when its first worker died, the restart already freed this one
+            self.frames[worker] += 1
+            self.busy_seconds[worker] += elapsed
+            self._idle.append(worker)
+            self._cond.notify()
+        if error is not None:
+            self.errors += 1
+            future.set_exception(RuntimeError(f"detector-{worker}: {error}"))
+        else:
+            future.set_result(detections)
+
+    def _replace_dead_workers(self, dead):
+        """Fail the frames the dead workers were holding and start fresh processes in their place"""
+        failed = []
+        with self._cond:
+            for worker in dead:
+                # Out of rotation until its replacement is up
+                if worker in self._idle:
+                    self._idle.remove(worker)
+                for job_id, (owner, future) in list(self._pending.items()):
+                    if owner == worker:
+                        del self._pending[job_id]
+                        failed.append((worker, future))
+        for worker, future in failed:
+            self.errors += 1
+            future.set_exception(RuntimeError(f"detector-{worker} exited"))
+
+        # Joining and starting processes can take a while: submit() and
+        # _finish() keep going on the live workers meanwhile
+        spawn = mp.get_context("spawn")
+        for worker in sorted(dead):
+            p = self.processes[worker]
+            p.join(1.0)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+            print(f"detector-{worker} exited with code {p.exitcode}, restarting it")
+            self.conns[worker].close()
+            self._start_worker(worker, ctx=spawn)
+            with self._cond:
+                self.restarts += 1
+                self._idle.append(worker)
+                self._cond.notify()
+
+    def stats(self):
+        uptime = time.monotonic() - self.started_at
+        total = sum(self.frames)
+        return {
+            "workers": self.workers,
+            "frames": total,
+            "fps": round(total / uptime, 2) if uptime > 0 else 0.0,
+            "errors": self.errors,
+            "restarts": self.restarts,
+            "per_worker": [
+                {"frames": n,
+                 "mean_ms": round(busy * 1000 / n, 2) if n else None,
+                 "utilization": round(busy / uptime, 3) if uptime > 0 else 0.0,
+                 "alive": p.is_alive()}
+                for n, busy, p in zip(self.frames, self.busy_seconds, self.processes)
+            ]
+        }
+
+    def shutdown(self, timeout=5.0):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for p in self.processes:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        for inbox in self.inboxes:
+            inbox.close()
+            inbox.unlink()
+        print("Detector pool stopped")
@@ -0,0 +1,96 @@
+# detection/line_counter.py
+import numpy as np
+
+from detection.structs import as_tracks
+
+
+def _cross(o, a, b):
+    """z of (a - o) x (b - o), broadcasting over leading dimensions"""
+    return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - (a[..., 1] - o[..., 1]) * (b[..., 0] - o[..., 0])
+
+
+class LineCounter:
+    """
+    Directional tripwire counting.
+    Each line is {"id", "points": [[x1, y1], [x2, y2]]}. A track crossing
+    from the left of p1->p2 to its right (as drawn on screen) counts as
+    "in", the opposite as "out". Crossings are found by testing each
+    track's previous->current anchor segment against every line at once.
+    """
+
+    def __init__(self, lines, max_gap=15):
+        self.lines = lines
+        self.max_gap = max_gap  # frames a track's last anchor is kept while it is unseen
+        self.line_ids = [line['id'] for line in lines]
+        pts = np.array([line['points'] for line in lines], dtype=np.float64).reshape(-1, 2, 2)
+        self.a, self.b = pts[:, 0], pts[:, 1]
+        self.reset()
+
+    def reset(self):
+        self.prev_ids = np.empty(0, dtype=np.int64)
+        self.prev_pts = np.empty((0, 2), dtype=np.float64)
+        self.prev_frame = np.empty(0, dtype=np.int64)
+        self.frame_index = 0
+        self.in_counts = np.zeros(len(self.lines), dtype=np.int64)
+        self.out_counts = np.zeros(len(self.lines), dtype=np.int64)
+
+    def update(self, tracks):
+        self.frame_index += 1
+        if not len(tracks):
+            self._prune()
+            return
+
+        tracks = as_tracks(tracks)
+        ids, first = np.unique(tracks["id"], return_index=True)
+        pts = tracks["anchor"][first].astype(np.float64)  # bottom-centre anchor
+
+        if len(self.lines) and len(self.prev_ids):
+            pos = np.searchsorted(self.prev_ids, ids)
+            pos_c = np.minimum(pos, len(self.prev_ids) - 1)
+            known = (pos < len(self.prev_ids)) & (self.prev_ids[pos_c] == ids)
+            p = self.prev_pts[pos_c[known]][:, None, :]   # (K,1,2)
+            q = pts[known][:, None, :]                    # (K,1,2)
+            a, b = self.a[None], self.b[None]             # (1,L,2)
+
+            # A point exactly on the line belongs to the right-hand side, so a
+            # path that stops on the line is counted once, not zero times
+            right_p = _cross(a, b, p) >= 0
+            right_q = _cross(a, b, q) >= 0
+            straddle = _cross(p, q, a) * _cross(p, q, b) <= 0
+            crossed = (right_p != right_q) & straddle     # (K,L)
+            self.in_counts += (crossed & ~right_p).sum(axis=0)
+            self.out_counts += (crossed & right_p).sum(axis=0)
+
+        # Merge current anchors into the kept state
+        keep = ~np.isin(self.prev_ids, ids)
+        all_ids = np.concatenate([self.prev_ids[keep], ids])
+        order = np.argsort(all_ids, kind='stable')
+        self.prev_ids = all_ids[order]
+        self.prev_pts = np.concatenate([self.prev_pts[keep], pts])[order]
+        self.prev_frame = np.concatenate([self.prev_frame[keep], np.full(len(ids), self.frame_index)])[order]
+        self._prune()
+
+    def _prune(self):
+        alive = self.frame_index - self.prev_frame <= self.max_gap
+        if not alive.all():
+            self.prev_ids = self.prev_ids[alive]
+            self.prev_pts = self.prev_pts[alive]
+            self.prev_frame = self.prev_frame[alive]
+
+    def adopt_state(self, old):
+        """Keep counts of unchanged lines (same id and points) and every track's last anchor"""
+        old_index = {(line['id'], str(line['points'])): i for i, line in enumerate(old.lines)}
+        for ni, line in enumerate(self.lines):
+            oi = old_index.get((line['id'], str(line['points'])))
+            if oi is not None:
+                self.in_counts[ni] = old.in_counts[oi]
+                self.out_counts[ni] = old.out_counts[oi]
+        self.prev_ids = old.prev_ids
+        self.prev_pts = old.prev_pts
+        self.prev_frame = old.prev_frame
+        self.frame_index = old.frame_index
+
+    def get_counts(self):
+        """{line_id: {"in": n, "out": m}}"""
+        return {lid: {"in": int(i), "out": int(o)}
+                for lid, i, o in zip(self.line_ids, self.in_counts, self.out_counts)}
@@ -0,0 +1,140 @@
+# detection/recording.py
+import glob
+import json
+import os
+
+import numpy as np
+
+from detection.structs import as_detections, detection_rows
+
+META_FILE = "meta.json"
+
+
+class DetectionRecorder:
+    """
+    Writes per-frame detections to a directory of NPZ chunks, chunk_frames
+    frames each, so footage only goes through YOLO once. Each chunk holds
+    frames (F,) int64, ts (F,) float64, offsets (F+1,) int64 and
+    dets (N, 6) float32 [x1, y1, x2, y2, conf, class_id]; frame i owns
+    dets[offsets[i]:offsets[i + 1]]. With embeddings=True the DeepSort
+    appearance embeddings are stored alongside as embeds (N, D) float32.
+    meta.json is written last, with "complete": false if the run that
+    produced the recording failed part way.
+    """
+
+    def __init__(self, path, chunk_frames=1000, embeddings=False, source=None):
+        if os.path.isdir(path) and glob.glob(os.path.join(path, "chunk_*.npz")):
+            raise FileExistsError(f"{path} already holds a recording")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_frames = chunk_frames
+        self.embeddings = embeddings
+        self.source = source
+        self.chunks = 0
+        self.frames = 0
+        self.detections = 0
+        self._reset()
+
+    def _reset(self):
+        self._frames, self._ts, self._counts, self._dets, self._embeds = [], [], [], [], []
+
+    def add(self, frame_index, ts, detections, embeds=None):
+        dets = detection_rows(detections)
+        self._frames.append(frame_index)
+        self._ts.append(ts)
+        self._counts.append(len(dets))
+        self._dets.append(dets)
+        if self.embeddings:
+            if embeds is None or len(embeds) != len(dets):
+                raise ValueError(f"Frame {frame_index}: expected {len(dets)} embeddings")
+            self._embeds.append(np.asarray(embeds, dtype=np.float32))
+        self.frames += 1
+        self.detections += len(dets)
+        if len(self._frames) >= self.chunk_frames:
+            self._flush()
+
+    def _flush(self):
+        if not self._frames:
+            return
+        arrays = {
+            "frames": np.asarray(self._frames, dtype=np.int64),
+            "ts": np.asarray(self._ts, dtype=np.float64),
+            "offsets": np.concatenate([[0], np.cumsum(self._counts)]).astype(np.int64),
+            "dets": np.concatenate(self._dets),
+        }
+        if self.embeddings:
+            # Frames without detections have (0, 0) embeddings, keep the real width
+            dim = max((e.shape[1] for e in self._embeds if e.ndim == 2 and len(e)), default=0)
+            arrays["embeds"] = np.concatenate([e.reshape(-1, dim) for e in self._embeds])
+        # Write then rename, so a crash never leaves a truncated chunk behind
+        name = os.path.join(self.path, f"chunk_{self.chunks:05d}.npz")
+        with open(name + ".tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(name + ".tmp", name)
+        self.chunks += 1
+        self._reset()
+
+    def close(self, complete=True):
+        self._flush()
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump({
+                "version": 2,
+                "complete": complete,
+                "source": self.source,
+                "frames": self.frames,
+                "detections": self.detections,
+                "chunks": self.chunks,
+                "chunk_frames": self.chunk_frames,
+                "embeddings": self.embeddings,
+            }, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(complete=exc_type is None)
+
+
+class DetectionReplay:
+    """
+    Iterates a DetectionRecorder directory as (frame_index, ts, dets, embeds)
+    with dets a DETECTION_DTYPE array and embeds (N, D) or None. Chunks
+    are loaded one at a time; no video is decoded.
+    Recordings that are incomplete (no meta.json, or the recording run
+    failed) are refused unless partial=True.
+    """
+
+    def __init__(self, path, partial=False):
+        self.path = path
+        self.chunk_files = sorted(glob.glob(os.path.join(path, "chunk_*.npz")))
+        if not self.chunk_files:
+            raise FileNotFoundError(f"No recording in {path}")
+        meta_file = os.path.join(path, META_FILE)
+        self.meta = {}
+        if os.path.exists(meta_file):
+            with open(meta_file) as f:
+                self.meta = json.load(f)
+        # Version 1 recordings predate the flag and were only written on success
+        if not partial and not self.meta.get("complete", bool(self.meta)):
+            raise ValueError(f"{path} is an incomplete recording, record the video again")
+
+    @property
+    def source(self):
+        return self.meta.get("source")
+
+    @property
+    def has_embeddings(self):
+        return bool(self.meta.get("embeddings"))
+
+    def __len__(self):
+        return self.meta.get("frames", 0)
+
+    def __iter__(self):
+        for name in self.chunk_files:
+            with np.load(name) as chunk:
+                frames, ts, offsets, dets = chunk["frames"], chunk["ts"], chunk["offsets"], chunk["dets"]
+                embeds = chunk["embeds"] if "embeds" in chunk.files else None
+            for i in range(len(frames)):
+                a, b = offsets[i], offsets[i + 1]
+                yield (int(frames[i]), float(ts[i]), as_detections(dets[a:b]),
+                       embeds[a:b] if embeds is not None else None)
@@ -0,0 +1,82 @@
+# detection/structs.py
+# Structured NumPy records passed between the pipeline stages.
+# A frame's detections and tracks are each one array, one record per object:
+#   detections: box [x1, y1, x2, y2], conf, cls
+#   tracks:     box [x1, y1, x2, y2], id, cls, anchor [x, y] (bottom centre)
+# Stages read whole columns (tracks["box"], tracks["id"], ...) instead of
+# unpacking tuples object by object.
+import numpy as np
+
+DETECTION_DTYPE = np.dtype([("box", np.float32, (4,)), ("conf", np.float32), ("cls", np.int32)])
+TRACK_DTYPE = np.dtype([("box", np.float32, (4,)), ("id", np.int64), ("cls", np.int32),
+                        ("anchor", np.float32, (2,))])
+
+# Zone/track pairs are packed into one int64: zone index in the high bits
+TRACK_BITS = 40
+TRACK_MASK = (1 << TRACK_BITS) - 1
+
+
+def track_key(track_id):
+    """Integer key for a track id (DeepSort uses numeric strings)"""
+    try:
+        return int(track_id) & TRACK_MASK
+    except (TypeError, ValueError):
+        return hash(track_id) & TRACK_MASK
+
+
+def member(sorted_keys, keys):
+    """Boolean mask of keys found in sorted_keys, plus their positions"""
+    pos = np.searchsorted(sorted_keys, keys)
+    if not len(sorted_keys):
+        return np.zeros(len(keys), bool), pos
+    found = (pos < len(sorted_keys)) & (sorted_keys[np.minimum(pos, len(sorted_keys) - 1)] == keys)
+    return found, pos
+
+
+def as_detections(detections):
+    """
+    Detections as a DETECTION_DTYPE array. Structured arrays pass through
+    untouched; [x1, y1, x2, y2, conf, class_id] rows (lists or an (N, 6)
+    array, e.g. from a recording) are converted in one go.
+    """
+    if isinstance(detections, np.ndarray) and detections.dtype == DETECTION_DTYPE:
+        return detections
+    rows = np.asarray(detections, dtype=np.float32).reshape(-1, 6)
+    dets = np.empty(len(rows), DETECTION_DTYPE)
+    dets["box"] = rows[:, :4]
+    dets["conf"] = rows[:, 4]
+    dets["cls"] = rows[:, 5]
+    return dets
+
+
+def detection_rows(detections):
+    """(N, 6) float32 [x1, y1, x2, y2, conf, class_id], the recording format"""
+    dets = as_detections(detections)
+    rows = np.empty((len(dets), 6), np.float32)
+    rows[:, :4] = dets["box"]
+    rows[:, 4] = dets["conf"]
+    rows[:, 5] = dets["cls"]
+    return rows
+
+
+def make_tracks(boxes, ids, classes=0):
+    """TRACK_DTYPE array from (N, 4) boxes and N integer ids, anchors filled in"""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    tracks = np.empty(len(boxes), TRACK_DTYPE)
+    tracks["box"] = boxes
+    tracks["id"] = ids
+    tracks["cls"] = classes
+    anchor = tracks["anchor"]
+    np.add(boxes[:, 0], boxes[:, 2], out=anchor[:, 0])
+    anchor[:, 0] *= 0.5
+    anchor[:, 1] = boxes[:, 3]
+    return tracks
+
+
+def as_tracks(tracks):
+    """Tracks as a TRACK_DTYPE array; [(ltrb, track_id, class_id)] tuples are converted"""
+    if isinstance(tracks, np.ndarray) and tracks.dtype == TRACK_DTYPE:
+        return tracks
+    return make_tracks([ltrb for ltrb, _, _ in tracks],
+                       np.array([track_key(tid) for _, tid, _ in tracks], np.int64),
+                       np.array([cls for _, _, cls in tracks], np.int32))
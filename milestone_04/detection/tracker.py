@@ -1,35 +1,351 @@
 # detection/tracker.py
-from deep_sort_realtime.deepsort_tracker import DeepSort
+import numpy as np
 
-class DeepSortTracker:
-    def __init__(self, max_age=30, nn_budget=100):
-        self.tracker = DeepSort(
-            max_age=max_age,
-            nn_budget=nn_budget,
+from detection.structs import TRACK_DTYPE, as_detections, make_tracks, track_key
+
+try:
+    from deep_sort_realtime.deepsort_tracker import DeepSort
+except ImportError:  # Only needed for the DeepSort backend
+    DeepSort = None
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # Fall back to greedy matching
+    linear_sum_assignment = None
+
+
+class BaseTracker:
+    """
+    Common tracker interface.
+    update(detections, frame) takes a DETECTION_DTYPE array (or
+    [x1, y1, x2, y2, conf, class_id] rows) and returns a TRACK_DTYPE array
+    of the confirmed tracks.
+    """
+
+    def update(self, detections, frame):
+        raise NotImplementedError
+
+    def reset(self):
+        raise NotImplementedError
+
+
+class DeepSortTracker(BaseTracker):
+    """
+    DeepSort with a mobilenet appearance embedder.
+    embed_mode="always" embeds every detection every frame (DeepSort default).
+    embed_mode="on_demand" only embeds detections whose association is
+    ambiguous (overlapping detections, several candidate tracks, new or
+    unmatched tracks) or whose track embedding is older than refresh_every
+    frames; the others reuse their track's last embedding. Crops that do
+    need embedding go through the model in one batch.
+    """
+
+    def __init__(self, max_age=30, nn_budget=100, embed_mode="always", refresh_every=10,
+                 gate_iou=0.3, overlap_iou=0.3):
+        if DeepSort is None:
+            raise ImportError("deep_sort_realtime is required for the DeepSort tracker")
+        if embed_mode not in ("always", "on_demand"):
+            raise ValueError("embed_mode must be 'always' or 'on_demand'")
+        self.max_age = max_age
+        self.nn_budget = nn_budget
+        self.embed_mode = embed_mode
+        self.refresh_every = refresh_every
+        self.gate_iou = gate_iou
+        self.overlap_iou = overlap_iou
+        self.keep_embeds = False  # set by a recorder to capture last_embeds
+        self.reset()
+
+    def _build(self):
+        return DeepSort(
+            max_age=self.max_age,
+            nn_budget=self.nn_budget,
             embedder="mobilenet",
             half=False,  # Disable half precision for CPU compatibility
             bgr=True
         )
 
-    def update(self, detections, frame):
+    def reset(self):
+        self.tracker = self._build()
+        self.features = {}       # track_id -> last computed embedding
+        self.feature_age = {}    # track_id -> frames since that embedding was computed
+        self.embeds_computed = 0
+        self.embeds_skipped = 0
+        self.last_embeds = None  # (N, D) embeddings used by the last update, if keep_embeds
+
+    @property
+    def skip_ratio(self):
+        """Fraction of detections that reused a cached embedding"""
+        total = self.embeds_computed + self.embeds_skipped
+        return self.embeds_skipped / total if total else 0.0
+
+    def _reusable_tracks(self, boxes):
+        """
+        For each detection, the id of the single track it unambiguously
+        matches with a fresh cached embedding, or None.
+        """
+        reuse = [None] * len(boxes)
+        tracks = [t for t in self.tracker.tracker.tracks
+                  if t.track_id in self.features and self.feature_age.get(t.track_id, 0) < self.refresh_every]
+        if not tracks or not len(boxes):
+            return reuse
+
+        track_boxes = np.array([t.to_ltrb(orig=False) for t in tracks], dtype=np.float32)
+        gate = iou_matrix(boxes, track_boxes) >= self.gate_iou
+        crowded = (iou_matrix(boxes, boxes) >= self.overlap_iou).sum(axis=1) > 1  # overlaps another detection
+        per_det = gate.sum(axis=1)
+        per_track = gate.sum(axis=0)
+
+        for d in np.flatnonzero((per_det == 1) & ~crowded):
+            t = int(np.flatnonzero(gate[d])[0])
+            if per_track[t] == 1:
+                reuse[d] = tracks[t].track_id
+        return reuse
+
+    def _embed(self, frame, boxes, reuse):
+        """Embeddings for all detections, computing only those without a reusable one"""
+        need = [i for i, tid in enumerate(reuse) if tid is None]
+        embeds = [None] * len(boxes)
+        if need:
+            h, w = frame.shape[:2]
+            crops = []
+            for i in need:
+                l, t, r, b = boxes[i]
+                l, t = max(int(l), 0), max(int(t), 0)
+                r, b = min(int(r), w), min(int(b), h)
+                crops.append(frame[t:max(b, t + 1), l:max(r, l + 1)])
+            computed = self.tracker.embedder.predict(crops)  # one batched forward pass
+            for i, e in zip(need, computed):
+                embeds[i] = e
+        for i, tid in enumerate(reuse):
+            if tid is not None:
+                embeds[i] = self.features[tid]
+        self.embeds_computed += len(need)
+        self.embeds_skipped += len(boxes) - len(need)
+        return embeds
+
+    @staticmethod
+    def _aligned(embeds, keep, n):
+        """Embeddings as an (n, D) array in input order, NaN rows for dropped detections"""
+        if not embeds:
+            return np.empty((n, 0), dtype=np.float32)
+        out = np.full((n, len(embeds[0])), np.nan, dtype=np.float32)
+        out[keep] = np.asarray(embeds, dtype=np.float32)
+        return out
+
+    def update(self, detections, frame, embeds=None):
         """
-        detections: list of [x1, y1, x2, y2, conf, class_id]
-        Returns: list of (ltrb, track_id, class_id)
+        detections: DETECTION_DTYPE array or [x1, y1, x2, y2, conf, class_id] rows
+        embeds: optional recorded embeddings, one row per detection; when
+        given nothing is embedded and frame may be None (replay)
+        Returns: TRACK_DTYPE array
         """
-        formatted_dets = []
-        for det in detections:
-            x1, y1, x2, y2, conf, cls = det
-            l, t, w, h = x1, y1, (x2 - x1), (y2 - y1)
-            formatted_dets.append(([l, t, w, h], conf, int(cls)))
-
-        tracks = self.tracker.update_tracks(formatted_dets, frame=frame)
-        
-        active_tracks = []
-        for track in tracks:
-            if not track.is_confirmed():
+        dets = as_detections(detections)
+        # DeepSort takes ([l, t, w, h], conf, class) tuples: build them in one pass
+        boxes = dets["box"]
+        ltwh = boxes.copy()
+        ltwh[:, 2:] -= ltwh[:, :2]
+        formatted_dets = list(zip(ltwh.tolist(), dets["conf"].tolist(), dets["cls"].tolist()))
+        # DeepSort drops zero-area boxes itself; do it first so embeds stay aligned
+        keep = np.flatnonzero((ltwh[:, 2] > 0) & (ltwh[:, 3] > 0))
+        self.last_embeds = None
+
+        if embeds is not None:
+            tracks = self.tracker.update_tracks([formatted_dets[i] for i in keep],
+                                                embeds=[embeds[i] for i in keep])
+            self.last_embeds = embeds
+        elif (self.embed_mode == "always" and not self.keep_embeds) or not formatted_dets:
+            self.embeds_computed += len(formatted_dets)
+            tracks = self.tracker.update_tracks(formatted_dets, frame=frame)
+        elif self.embed_mode == "always":
+            # Same as above, but embedded here so the embeddings can be kept
+            formatted_dets = [formatted_dets[i] for i in keep]
+            embeds = self._embed(frame, boxes[keep], [None] * len(keep))
+            tracks = self.tracker.update_tracks(formatted_dets, embeds=embeds, frame=frame)
+            self.last_embeds = self._aligned(embeds, keep, len(dets))
+        else:
+            formatted_dets = [formatted_dets[i] for i in keep]
+            reuse = self._reusable_tracks(boxes[keep])
+            embeds = self._embed(frame, boxes[keep], reuse)
+            tracks = self.tracker.update_tracks(formatted_dets, embeds=embeds, frame=frame,
+                                                others=list(range(len(formatted_dets))))
+            if self.keep_embeds:
+                self.last_embeds = self._aligned(embeds, keep, len(dets))
+
+            # Fresh embeddings reset a track's age, reused ones make it older
+            alive = set()
+            for track in tracks:
+                alive.add(track.track_id)
+                det_index = track.get_det_supplementary() if track.time_since_update == 0 else None
+                if det_index is None:
+                    continue
+                if reuse[det_index] is None or track.track_id not in self.features:
+                    self.features[track.track_id] = embeds[det_index]
+                    self.feature_age[track.track_id] = 0
+                else:
+                    self.feature_age[track.track_id] += 1
+            for tid in [tid for tid in self.features if tid not in alive]:
+                del self.features[tid]
+                self.feature_age.pop(tid, None)
+
+        if self.keep_embeds and self.last_embeds is None:
+            self.last_embeds = self._aligned([], keep, len(dets))  # no detections this frame
+
+        confirmed = [track for track in tracks if track.is_confirmed()]
+        if not confirmed:
+            return np.empty(0, TRACK_DTYPE)
+        return make_tracks([track.to_ltrb() for track in confirmed],
+                           [track_key(track.track_id) for track in confirmed],
+                           0)  # 0 = person class
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between (N,4) and (M,4) ltrb boxes, returns (N,M)"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    wh = np.clip(rb - lt, 0, None)
+    inter = wh[..., 0] * wh[..., 1]
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def match(iou, threshold, use_hungarian=True):
+    """
+    Assign rows to columns maximising IoU.
+    Returns (matches (K,2), unmatched_rows, unmatched_cols).
+    """
+    n, m = iou.shape
+    if n == 0 or m == 0:
+        return np.empty((0, 2), dtype=int), np.arange(n), np.arange(m)
+
+    if use_hungarian and linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(-iou)
+    else:
+        # Greedy: take the best remaining pair until none is above threshold
+        order = np.argsort(-iou, axis=None)
+        used_r = np.zeros(n, bool)
+        used_c = np.zeros(m, bool)
+        rows, cols = [], []
+        for flat in order:
+            r, c = divmod(int(flat), m)
+            if iou[r, c] < threshold:
+                break
+            if used_r[r] or used_c[c]:
                 continue
-            track_id = track.track_id
-            ltrb = track.to_ltrb()  # left, top, right, bottom
-            active_tracks.append((ltrb, track_id, 0))  # 0 = person class
+            used_r[r] = used_c[c] = True
+            rows.append(r)
+            cols.append(c)
+        rows, cols = np.array(rows, dtype=int), np.array(cols, dtype=int)
+
+    keep = iou[rows, cols] >= threshold
+    matches = np.stack([rows[keep], cols[keep]], axis=1) if keep.any() else np.empty((0, 2), dtype=int)
+    unmatched_rows = np.setdiff1d(np.arange(n), matches[:, 0])
+    unmatched_cols = np.setdiff1d(np.arange(m), matches[:, 1])
+    return matches, unmatched_rows, unmatched_cols
+
+
+class IoUTracker(BaseTracker):
+    """
+    SORT/ByteTrack-style tracker on IoU alone, no appearance model.
+    Track state lives in NumPy arrays; boxes are predicted with a smoothed
+    constant velocity. Detections above high_conf are matched first, then
+    the low-confidence ones are used to keep existing tracks alive.
+    """
+
+    def __init__(self, max_age=30, min_hits=3, iou_threshold=0.3, high_conf=0.6,
+                 use_hungarian=True, velocity_smoothing=0.5):
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.iou_threshold = iou_threshold
+        self.high_conf = high_conf
+        self.use_hungarian = use_hungarian
+        self.velocity_smoothing = velocity_smoothing
+        self.reset()
+
+    def reset(self):
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.velocity = np.empty((0, 4), dtype=np.float32)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.classes = np.empty(0, dtype=np.int64)
+        self.hits = np.empty(0, dtype=np.int32)
+        self.misses = np.empty(0, dtype=np.int32)  # frames since last matched
+        self.next_id = 1
+
+    def update(self, detections, frame=None):
+        dets = as_detections(detections)
+        det_boxes = dets["box"]
+
+        # Predict
+        self.boxes = self.boxes + self.velocity
+        self.misses += 1
+
+        high = np.flatnonzero(dets["conf"] >= self.high_conf)
+        low = np.flatnonzero(dets["conf"] < self.high_conf)
+
+        # Stage 1: all tracks against confident detections
+        m1, free_tracks, free_high = match(iou_matrix(self.boxes, det_boxes[high]),
+                                           self.iou_threshold, self.use_hungarian)
+        # Stage 2: leftover tracks against low-confidence detections
+        m2, _, _ = match(iou_matrix(self.boxes[free_tracks], det_boxes[low]),
+                         self.iou_threshold, self.use_hungarian)
+
+        t_idx = np.concatenate([m1[:, 0], free_tracks[m2[:, 0]]]).astype(int)
+        d_idx = np.concatenate([high[m1[:, 1]], low[m2[:, 1]]]).astype(int)
+
+        if len(t_idx):
+            new_boxes = det_boxes[d_idx]
+            a = self.velocity_smoothing
+            prev = self.boxes[t_idx] - self.velocity[t_idx]  # box before prediction
+            self.velocity[t_idx] = a * self.velocity[t_idx] + (1 - a) * (new_boxes - prev)
+            self.boxes[t_idx] = new_boxes
+            self.classes[t_idx] = dets["cls"][d_idx]
+            self.hits[t_idx] += 1
+            self.misses[t_idx] = 0
+
+        # Unmatched confident detections start new tracks
+        spawn = high[free_high]
+        if len(spawn):
+            k = len(spawn)
+            self.boxes = np.vstack([self.boxes, det_boxes[spawn]])
+            self.velocity = np.vstack([self.velocity, np.zeros((k, 4), np.float32)])
+            self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + k)])
+            self.classes = np.concatenate([self.classes, dets["cls"][spawn]])
+            self.hits = np.concatenate([self.hits, np.ones(k, np.int32)])
+            self.misses = np.concatenate([self.misses, np.zeros(k, np.int32)])
+            self.next_id += k
+
+        # Drop tracks that have been lost too long
+        alive = self.misses <= self.max_age
+        if not alive.all():
+            self.boxes = self.boxes[alive]
+            self.velocity = self.velocity[alive]
+            self.ids = self.ids[alive]
+            self.classes = self.classes[alive]
+            self.hits = self.hits[alive]
+            self.misses = self.misses[alive]
+
+        out = np.flatnonzero((self.misses == 0) & (self.hits >= self.min_hits))
+        return make_tracks(self.boxes[out], self.ids[out], self.classes[out])
+
+
+TRACKERS = {
+    "deepsort": DeepSortTracker,
+    "iou": IoUTracker,
+}
+
 
-        return active_tracks
\ No newline at end of file
+def create_tracker(kind="deepsort", embed_mode=None, **kwargs):
+    """
+    Build a tracker backend by name: 'deepsort' (appearance, accurate) or 'iou' (fast).
+    embed_mode: DeepSort's 'always' or 'on_demand', see DeepSortTracker
+    """
+    if kind not in TRACKERS:
+        raise ValueError(f"Unknown tracker '{kind}', choose from {sorted(TRACKERS)}")
+    if embed_mode is not None:
+        if kind != "deepsort":
+            raise ValueError("embed_mode only applies to the deepsort tracker")
+        kwargs["embed_mode"] = embed_mode
+    return TRACKERS[kind](**kwargs)
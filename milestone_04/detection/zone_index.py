@@ -0,0 +1,34 @@
+# detection/zone_index.py
+import numpy as np
+
+
+class ZoneGridIndex:
+    """
+    Uniform grid over the zones' bounding boxes.
+    Each cell lists the zones whose bounding box overlaps it, so a point
+    only has to be tested against the few zones registered in its cell.
+    """
+
+    def __init__(self, polygons, cell_size=64):
+        """polygons: list of (N,2) point arrays, in zone order"""
+        self.cell_size = cell_size
+        self.bboxes = np.array([[p[:, 0].min(), p[:, 1].min(), p[:, 0].max(), p[:, 1].max()]
+                                if len(p) else [0, 0, -1, -1]  # empty zone matches nothing
+                                for p in polygons], dtype=np.int64).reshape(-1, 4)
+        self._boxes = [tuple(int(v) for v in b) for b in self.bboxes]  # plain ints for fast queries
+        self.cells = {}
+        for zi, (x1, y1, x2, y2) in enumerate(self._boxes):
+            for cx in range(x1 // cell_size, x2 // cell_size + 1):
+                for cy in range(y1 // cell_size, y2 // cell_size + 1):
+                    self.cells.setdefault((cx, cy), []).append(zi)
+
+    def query(self, point):
+        """Indices of zones whose bounding box contains point"""
+        x, y = point
+        candidates = self.cells.get((x // self.cell_size, y // self.cell_size), ())
+        hits = []
+        for zi in candidates:
+            x1, y1, x2, y2 = self._boxes[zi]
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                hits.append(zi)
+        return hits
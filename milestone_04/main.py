@@ -1,22 +1,29 @@
 # main.py
 import cv2
-import threading
 import time
 import numpy as np
 import os
+from datetime import datetime
 from flask import Flask, render_template, Response, jsonify, send_from_directory, request, redirect, url_for
 from flask_jwt_extended import (
     JWTManager, create_access_token, jwt_required, get_jwt_identity,
     set_access_cookies, unset_jwt_cookies, get_jwt
 )
 from camera_feed import CameraFeed
+from shared_camera import SharedFrameSource
 from zones import ZoneManager
-from detection.detector import YOLODetector
-from detection.tracker import DeepSortTracker
-from detection.counter import ZoneCounter
+from zone_reloader import ZoneReloader
+from worker import ProcessingWorker
+from detection.detector_pool import DetectorPool
+from detection.tracker import create_tracker
 from dashboard.data_manager import DataManager
+from dashboard.alert_sinks import load_dispatcher
 from auth.models import create_user, verify_user, get_all_users
-from utils.report_generator import generate_pdf
+from utils.report_generator import generate_pdf, choose_interval
+from utils.export_jobs import ExportJobManager
+from utils.report_cache import ReportCache
+from utils.metrics import Metrics, camera_label
+from utils.profiler import LoopProfiler
 
 app = Flask(__name__, template_folder='dashboard/templates', static_folder='dashboard/static')
 app.secret_key = 'amitkumar'
@@ -28,68 +35,158 @@ jwt = JWTManager(app)
 # Global objects
 data_manager = DataManager()
 zone_manager = ZoneManager()
-detector = YOLODetector()
-tracker = DeepSortTracker()
+zone_reloader = ZoneReloader()
+# >0: run detection in that many worker processes shared by all cameras
+DETECTOR_WORKERS = 0
+# DeepSort embeddings: "always" per detection, or "on_demand" only where association is ambiguous
+EMBED_MODE = "always"
+# Built by build_pipeline(), not at import: spawned capture and detector
+# processes import this module too and must not load models
+detector = None
+tracker = None
+export_jobs = ExportJobManager(
+    export_dir=data_manager.export_dir,
+    cache=ReportCache(cache_dir=data_manager.export_dir)
+)
+metrics = Metrics()
+profiler = LoopProfiler(output_dir=data_manager.export_dir, metrics=metrics)
 counter = None
+line_counter = None
 camera = None
-processing_thread = None
-
-def process_video():
-    global counter, camera
-
-    if camera is None or not camera.start_camera():
-        print("Failed to start camera in thread")
+# Decode in a separate capture process and hand frames over through shared memory
+CAPTURE_PROCESS = False
+
+def build_pipeline():
+    """Load the detector and tracker once, on first use"""
+    global detector, tracker
+    if detector is None:
+        if DETECTOR_WORKERS > 0:
+            detector = DetectorPool(workers=DETECTOR_WORKERS)
+        else:
+            from detection.detector import YOLODetector
+            detector = YOLODetector()
+    if tracker is None:
+        tracker = create_tracker("deepsort", embed_mode=EMBED_MODE)  # or "iou" for the lightweight IoU tracker
+
+def open_camera(source, loop=False, capture_process=CAPTURE_PROCESS, media_start=None):
+    """media_start: epoch time of a video file's first frame, for its history timeline"""
+    if capture_process:
+        return SharedFrameSource(source=source, loop=loop, media_start=media_start)
+    return CameraFeed(source=source, loop=loop, media_start=media_start)
+
+def apply_zone_bundle(bundle):
+    """Swap in zones built by the reloader, keeping state of unchanged zones"""
+    global zone_manager, counter, line_counter
+
+    new_counter, new_line_counter = bundle["counter"], bundle["line_counter"]
+    if new_counter is not None and counter is not None:
+        new_counter.adopt_state(counter)
+    if new_line_counter is not None and line_counter is not None:
+        new_line_counter.adopt_state(line_counter)
+
+    # Limits removed from zones.json are dropped; ones set through the API stay on top
+    manager = bundle["manager"]
+    thresholds = {zone['id']: zone['threshold'] for zone in manager.zones if 'threshold' in zone}
+    for line in manager.lines:
+        if 'threshold' in line:
+            thresholds[f"{line['id']}:in"] = line['threshold']
+            thresholds[f"{line['id']}:out"] = line['threshold']
+    data_manager.replace_zone_thresholds(thresholds)
+
+    zone_manager, counter, line_counter = manager, new_counter, new_line_counter
+
+def process_video(worker):
+    global counter, line_counter
+
+    # Bind this loop to the camera it was started for
+    cam = camera
+    if cam is None:
         return
+    build_pipeline()
+    if not cam.start_camera():
+        print("Failed to start camera in thread, retrying with backoff")
 
-    # Load zones once at start
-    zone_manager.load_zones()
-    if zone_manager.zones:
-        counter = ZoneCounter(zone_manager.zones)
-    else:
-        counter = None
+    # Load zones at start, later edits to zones.json are picked up by the reloader
+    counter = None
+    line_counter = None
+    apply_zone_bundle(zone_reloader.build())
+    zone_reloader.start()
 
     print("Video processing started")
-
-    while True:
-        if camera is None or not hasattr(camera, 'is_opened') or not camera.is_opened:
-            time.sleep(0.1)
-            continue
-
-        ret, frame = camera.read_frame()
+    timer = metrics.frame_timer(cam.source)
+
+    while not worker.should_stop():
+        if profiler.active:
+            profiler.tick()
+        timer.begin()
+        # read_frame() handles reconnects, looping and health state itself
+        ret, frame = cam.read_frame()
         if not ret:
-            time.sleep(0.1)
+            worker.wait(1.0 if cam.state in ("failed", "ended") else 0.1)
             continue
+        timer.mark("read")
+        # Media time for files, capture time for live sources
+        frame_ts = cam.frame_time
+
+        # Swap in reloaded zones between frames
+        zone_reloader.frame_shape = frame.shape
+        bundle = zone_reloader.take()
+        if bundle is not None:
+            apply_zone_bundle(bundle)
 
         # Detection & Tracking
         detections = detector.detect(frame)
+        timer.mark("detect")
         tracks = tracker.update(detections, frame)
+        timer.mark("track")
 
         current_counts = {}
+        occupancy = {}
+        dwell = {}
         total = 0
 
         if counter and zone_manager.zones:
-            counter.update(tracks)
+            counter.update(tracks, now=frame_ts)
             current_counts = counter.get_counts()
+            occupancy = counter.get_occupancy()
+            dwell = counter.get_dwell_stats(now=frame_ts)
             total = sum(current_counts.values())
             heatmap_frame = counter.update_heatmap(frame, tracks)
         else:
             heatmap_frame = frame
             total = len(tracks)
+        timer.mark("zones")
+
+        line_counts = {}
+        if line_counter:
+            line_counter.update(tracks)
+            line_counts = line_counter.get_counts()
+        timer.mark("lines")
 
         # Update data manager
-        data_manager.update_counts(current_counts, total)
+        data_manager.update_counts(current_counts, total, occupancy, dwell, line_counts, timestamp=frame_ts,
+                                   windows=counter.get_windows() if counter else None)
+        timer.mark("publish")
 
         # Draw zones and bounding boxes
         display_frame = zone_manager.draw_zones(heatmap_frame.copy(), show_labels=True)
 
-        for (l, t, r, b), tid, _ in tracks:
-            cv2.rectangle(display_frame, (int(l), int(t)), (int(r), int(b)), (0, 255, 255), 2)
-            cv2.putText(display_frame, f"ID:{tid}", (int(l), int(t)-10),
+        for (l, t, r, b), tid in zip(tracks["box"].astype(np.int32).tolist(), tracks["id"].tolist()):
+            cv2.rectangle(display_frame, (l, t), (r, b), (0, 255, 255), 2)
+            cv2.putText(display_frame, f"ID:{tid}", (l, t-10),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        timer.mark("draw")
 
         # Encode for web streaming
         _, jpeg = cv2.imencode('.jpg', display_frame)
-        data_manager.current_frame = jpeg.tobytes()
+        data_manager.update_frame(jpeg.tobytes())
+        timer.mark("encode")
+        timer.end()
+        worker.frame_done()
+
+    print("Video processing stopped")
+
+processing_worker = ProcessingWorker(process_video)
 
 # Routes
 @app.route('/register', methods=['GET', 'POST'])
@@ -139,22 +236,58 @@ def index():
 @jwt_required()
 def video_feed():
     def gen():
-        while True:
-            frame = getattr(data_manager, 'current_frame', None)
-            if frame:
-                yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-            else:
-                blank = np.zeros((480, 640, 3), np.uint8)
-                cv2.putText(blank, 'Camera Loading...', (100, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-                _, jpeg = cv2.imencode('.jpg', blank)
-                yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
-            time.sleep(0.1)
+        metrics.client_connected()
+        try:
+            while True:
+                frame = data_manager.snapshot.frame
+                if frame:
+                    yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+                else:
+                    blank = np.zeros((480, 640, 3), np.uint8)
+                    cv2.putText(blank, 'Camera Loading...', (100, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+                    _, jpeg = cv2.imencode('.jpg', blank)
+                    yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
+                time.sleep(0.1)
+        finally:
+            metrics.client_disconnected()
     return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
+def queue_depths():
+    depths = {}
+    dispatcher = data_manager.dispatcher
+    if dispatcher is not None:
+        depths[(("queue", "alert_events"),)] = dispatcher.depth()
+    with export_jobs.lock:
+        depths[(("queue", "export_jobs"),)] = sum(
+            1 for job in export_jobs.jobs.values() if job["status"] in ("queued", "running"))
+    if isinstance(detector, DetectorPool):
+        depths[(("queue", "detector_pool"),)] = detector.depth()
+    return depths
+
+def dropped_frames():
+    if camera is None:
+        return {}
+    return {(("camera", camera_label(camera.source)),): getattr(camera, "dropped", 0)}
+
+metrics.register_gauge("queue_depth", "Items waiting in internal queues", queue_depths)
+metrics.register_gauge("dropped_frames", "Frames decoded but skipped before processing", dropped_frames)
+metrics.register_gauge("embed_skip_ratio", "Share of DeepSort detections that reused a cached embedding",
+                       lambda: round(tracker.skip_ratio, 4) if hasattr(tracker, "skip_ratio") else None)
+metrics.register_gauge("alert_events_dropped", "Alert events dropped by the dispatcher queue",
+                       lambda: data_manager.dispatcher.stats["dropped"] if data_manager.dispatcher else None)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    # Unauthenticated so Prometheus can scrape it: no counts or user data, and
+    # cameras are labelled by camera_label(), which drops credentials and paths
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/data')
 @jwt_required()
 def get_data():
-    return jsonify(data_manager.get_data())
+    data = data_manager.get_data()
+    data["camera"] = camera.health() if camera else None
+    return jsonify(data)
 
 @app.route('/set_threshold', methods=['POST'])
 @jwt_required()
@@ -163,7 +296,15 @@ def set_threshold():
     if jwt_data.get('role') != 'admin':
         return jsonify({"error": "Admin access required"}), 403
     threshold = request.json.get('threshold', 20)
-    data_manager.set_global_threshold(int(threshold))
+    zone_id = request.json.get('zone')
+    if zone_id is None or zone_id == '':
+        data_manager.set_global_threshold(int(threshold))
+    else:
+        try:
+            zone_id = int(zone_id)
+        except (TypeError, ValueError):
+            pass
+        data_manager.set_zone_threshold(zone_id, None if threshold is None else int(threshold))
     return jsonify({"status": "Threshold updated"})
 
 @app.route('/admin/change_camera', methods=['POST'])
@@ -173,32 +314,118 @@ def change_camera():
     if jwt_data.get('role') != 'admin':
         return jsonify({"error": "Admin access required"}), 403
 
-    global camera, counter, processing_thread
+    global camera, counter, line_counter, tracker
 
-    source_input = request.json.get('source', '0').strip()
+    switch_started = time.monotonic()
+    source_input = str(request.json.get('source', '0')).strip()
     try:
         source = int(source_input)
     except:
         source = source_input
 
-    # Stop old camera and thread
-    if camera:
-        camera.stop_camera()
-        time.sleep(1.0)
-
+    # Optional recording start for video files: epoch seconds or ISO 8601
+    media_start = request.json.get('media_start')
+    if media_start is not None:
+        try:
+            media_start = float(media_start)
+        except (TypeError, ValueError):
+            try:
+                media_start = datetime.fromisoformat(str(media_start)).timestamp()
+            except ValueError:
+                return jsonify({"error": "media_start must be epoch seconds or an ISO 8601 time"}), 400
+
+    # Optional tracker backend per camera: "deepsort" or "iou", and DeepSort's embed_mode
+    tracker_kind = request.json.get('tracker')
+    embed_mode = request.json.get('embed_mode')
+    new_tracker = None
+    if tracker_kind or embed_mode:
+        try:
+            new_tracker = create_tracker(tracker_kind or "deepsort", embed_mode=embed_mode)
+        except (ValueError, ImportError) as e:
+            return jsonify({"error": str(e)}), 400
+
+    # Cancel the old loop; an interrupted camera stops a read stuck on a stalled
+    # stream within its read timeout and releases the capture from the reader
+    # thread. Frames a slow loop still holds stay mapped until stop_camera().
+    old_camera = camera
+    stopped = processing_worker.stop(timeout=3.0, on_timeout=old_camera.interrupt if old_camera else None)
+    if not stopped:
+        return jsonify({"error": "Old processing loop did not stop", "worker": processing_worker.status()}), 500
+    if old_camera:
+        old_camera.stop_camera()
+
+    # Same detector, fresh tracker state and counters for the new scene
+    if new_tracker is not None:
+        tracker = new_tracker
+    elif tracker is not None:
+        tracker.reset()
     counter = None
+    line_counter = None
+    data_manager.reset_timeline()
 
-    # New camera
-    camera = CameraFeed(source=source)
+    camera = open_camera(source, loop=bool(request.json.get('loop', False)),
+                         capture_process=bool(request.json.get('capture_process', CAPTURE_PROCESS)),
+                         media_start=media_start)
+    processing_worker.start(switch_started=switch_started)
 
-    # Restart processing thread
-    if processing_thread and processing_thread.is_alive():
-        # Can't stop thread, but we restart it
-        pass
-    processing_thread = threading.Thread(target=process_video, daemon=True)
-    processing_thread.start()
+    return jsonify({"status": f"Camera changed to {source}",
+                    "stop_seconds": round(time.monotonic() - switch_started, 3)})
 
-    return jsonify({"status": f"Camera changed to {source}"})
+@app.route('/admin/worker_status')
+@jwt_required()
+def worker_status():
+    jwt_data = get_jwt()
+    if jwt_data.get('role') != 'admin':
+        return jsonify({"error": "Admin access required"}), 403
+    status = processing_worker.status()
+    status["cameras"] = metrics.summary()
+    status["tracker"] = {"kind": type(tracker).__name__ if tracker is not None else None}
+    if hasattr(tracker, "skip_ratio"):
+        status["tracker"].update(embed_mode=tracker.embed_mode, embeds_computed=tracker.embeds_computed,
+                                 embeds_skipped=tracker.embeds_skipped, skip_ratio=round(tracker.skip_ratio, 4))
+    if isinstance(detector, DetectorPool):
+        status["detector_pool"] = detector.stats()
+    return jsonify(status)
+
+@app.route('/admin/profile', methods=['POST'])
+@jwt_required()
+def profile_loop():
+    jwt_data = get_jwt()
+    if jwt_data.get('role') != 'admin':
+        return jsonify({"error": "Admin access required"}), 403
+
+    body = request.json or {}
+    try:
+        seconds = float(body.get('seconds', 10))
+    except (TypeError, ValueError):
+        return jsonify({"error": "seconds must be a number"}), 400
+    if not 0 < seconds <= 120:
+        return jsonify({"error": "seconds must be between 0 and 120"}), 400
+
+    # Blocks for the profile window; the files are served by /download
+    try:
+        result = profiler.run(seconds, mode=body.get('mode', 'cprofile'),
+                              thread=processing_worker.thread, trace=bool(body.get('trace', False)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    except TimeoutError as e:
+        return jsonify({"error": str(e)}), 503
+    result["profile_url"] = url_for('download', filename=result["profile"])
+    if result["trace"]:
+        result["trace_url"] = url_for('download', filename=result["trace"])
+    return jsonify(result)
+
+@app.route('/admin/reload_zones', methods=['POST'])
+@jwt_required()
+def reload_zones():
+    jwt_data = get_jwt()
+    if jwt_data.get('role') != 'admin':
+        return jsonify({"error": "Admin access required"}), 403
+    if not zone_reloader.request_reload():
+        return jsonify({"status": "zones.json not found, zones and lines will be cleared", "found": False})
+    return jsonify({"status": "Zone reload requested", "found": True})
 
 @app.route('/admin/users')
 @jwt_required()
@@ -219,19 +446,44 @@ def admin_users():
 @app.route('/export_csv')
 @jwt_required()
 def export_csv():
-    path = data_manager.export_csv()
-    if path:
-        return jsonify({"filename": os.path.basename(path)})
-    return jsonify({"error": "No data"})
+    history = data_manager.snapshot.history
+    if not history:
+        return jsonify({"error": "No data"})
+    # Keyed on the time range floored to the report interval: clicks a few
+    # frames apart on a live camera share one job and one cached file
+    job_id = export_jobs.submit(
+        "csv",
+        lambda path, progress: data_manager.export_csv(history, path),
+        key=ReportCache.make_key("csv", history, resolution=choose_interval(history))
+    )
+    return jsonify({"job_id": job_id})
 
 @app.route('/export_pdf')
 @jwt_required()
 def export_pdf():
-    if not data_manager.history:
+    history = data_manager.snapshot.history
+    if not history:
         return jsonify({"error": "No data"})
-    pdf_path = "dashboard/exports/report.pdf"
-    generate_pdf(data_manager.history, pdf_path)
-    return jsonify({"filename": "report.pdf"})
+    # Breaches in the report follow the alert rules: per-zone limits, occupancy, hysteresis
+    snap = data_manager.snapshot
+    params = {"threshold": snap.threshold, "interval": choose_interval(history),
+              "zone_thresholds": {str(k): v for k, v in snap.zone_thresholds.items()},
+              "exit_margin": data_manager.alert_engine.exit_margin,
+              "breach_source": data_manager.alert_source}
+    job_id = export_jobs.submit(
+        "pdf",
+        lambda path, progress: generate_pdf(history, path, progress_cb=progress, **params),
+        key=ReportCache.make_key("pdf", history, params, resolution=params["interval"])
+    )
+    return jsonify({"job_id": job_id})
+
+@app.route('/export_status/<job_id>')
+@jwt_required()
+def export_status(job_id):
+    status = export_jobs.get_status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(status)
 
 @app.route('/download/<filename>')
 @jwt_required()
@@ -240,11 +492,14 @@ def download(filename):
 
 if __name__ == "__main__":
     os.makedirs("dashboard/exports", exist_ok=True)
-    # camera = CameraFeed(source=0)    # web cam
-    camera = CameraFeed(source="Milestone_03\People_crowd.mp4")    # video source
-
-    processing_thread = threading.Thread(target=process_video, daemon=True)
-    processing_thread.start()
+    dispatcher = load_dispatcher()
+    if dispatcher:
+        data_manager.set_dispatcher(dispatcher)
+    build_pipeline()
+    # camera = open_camera(0)    # web cam
+    camera = open_camera("Milestone_03\People_crowd.mp4")    # video source
+
+    processing_worker.start()
 
     print("=== Crowd Count System - Milestone 4 ===")
     print("Go to http://127.0.0.1:5000/login")
@@ -0,0 +1,325 @@
+# shared_camera.py
+import contextlib
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+HEADER_FIELDS = 2  # per slot: sequence number, capture time (ns)
+_attach_lock = threading.Lock()
+
+
+def attach_shared_memory(name):
+    """Attach to an existing block without registering it with the resource tracker"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    # Older Pythons always register on attach. Unregistering afterwards is
+    # wrong when the tracker is shared with the creator (spawned children
+    # inherit it): it drops the creator's entry too. So skip registering.
+    from multiprocessing import resource_tracker
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class FrameRing:
+    """
+    Fixed ring of preallocated frame slots in one shared memory block.
+    Layout: an int64 header (seq, capture_ns) per slot plus one row for
+    the reader, then the frames. The writer marks a slot -1 while copying,
+    so readers can tell a slot that is being rewritten from a valid one,
+    and never writes into the slot the reader currently holds. Claiming a
+    slot (writer) and pinning one (reader) happen under a lock shared by
+    both processes, so neither can slip in between the other's check and
+    its mark.
+    """
+
+    def __init__(self, shape, slots=8, dtype=np.uint8, name=None, create=False, lock=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        if slots < 3:
+            raise ValueError("FrameRing needs at least 3 slots")
+        header_bytes = (slots + 1) * HEADER_FIELDS * 8
+        frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * frame_bytes, name=name)
+        else:
+            self.shm = attach_shared_memory(name)
+        self.owner = create
+        self.name = self.shm.name
+        rows = np.ndarray((slots + 1, HEADER_FIELDS), dtype=np.int64, buffer=self.shm.buf)
+        self.header = rows[:slots]
+        self.reader = rows[slots]  # [held slot, last seq read]
+        self.frames = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf, offset=header_bytes)
+        self._next = 0
+        self.lock = lock if lock is not None else contextlib.nullcontext()
+        if create:
+            rows[:] = -1
+
+    def write(self, seq, frame, capture_ns):
+        """Copy frame into the next free slot, returns the slot index"""
+        with self.lock:
+            slot = self._next
+            if slot == self.reader[0]:
+                slot = (slot + 1) % self.slots
+            self.header[slot, 0] = -1  # claimed: hold() now refuses it
+        self._next = (slot + 1) % self.slots
+        self.frames[slot][...] = frame
+        self.header[slot, 1] = capture_ns
+        self.header[slot, 0] = seq
+        return slot
+
+    def hold(self, slot, seq):
+        """
+        Zero-copy view of a slot, or None if it no longer holds seq.
+        The slot is pinned for the reader until the next hold() call.
+        """
+        with self.lock:
+            if self.header[slot, 0] != seq:
+                self.reader[0] = -1
+                return None
+            self.reader[0] = slot
+        self.reader[1] = seq
+        return self.frames[slot]
+
+    def backlog(self, seq):
+        """Frames written but not yet read, as seen by the writer about to write seq"""
+        return seq - 1 - self.reader[1]
+
+    def close(self):
+        """
+        Unmap the block. Views handed out by hold() must be gone by now:
+        numpy does not pin the mapping, so touching one afterwards crashes.
+        """
+        # Drop our views before closing the mapping
+        self.header = None
+        self.reader = None
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def capture_process(source, loop, slots, meta_queue, stop_event, health_interval=1.0, media_start=None,
+                    ring_lock=None):
+    """
+    Runs in its own process: decodes frames from a CameraFeed into a
+    FrameRing and sends only (slot, seq, frame time ns) metadata. The frame
+    time is CameraFeed.frame_time: media time for files, capture time live.
+    Live sources free-run and the reader skips to the newest frame; video
+    files wait for the reader instead so no frame is lost.
+    """
+    from camera_feed import CameraFeed
+
+    cam = CameraFeed(source=source, loop=loop, media_start=media_start)
+    lossless = cam.is_file
+    cam.start_camera()
+    ring = None
+    seq = 0
+    last_health = 0.0
+    try:
+        while not stop_event.is_set():
+            now = time.monotonic()
+            if now - last_health >= health_interval:
+                last_health = now
+                _put_latest(meta_queue, ("health", cam.health()))
+
+            ret, frame = cam.read_frame()
+            if not ret:
+                stop_event.wait(1.0 if cam.state in ("failed", "ended") else 0.05)
+                continue
+
+            if ring is None or ring.shape != frame.shape:
+                if ring is not None:
+                    ring.close()  # source changed resolution: new ring
+                ring = FrameRing(frame.shape, slots=slots, dtype=frame.dtype, create=True, lock=ring_lock)
+                # The reader can't use any frame without this one, so don't drop it
+                while not stop_event.is_set():
+                    try:
+                        meta_queue.put(("ring", ring.name, frame.shape, str(frame.dtype), slots), timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+
+            while lossless and ring.backlog(seq) >= slots - 2 and not stop_event.is_set():
+                stop_event.wait(0.002)
+
+            slot = ring.write(seq, frame, int(cam.frame_time * 1e9))
+            _put_latest(meta_queue, ("frame", slot, seq, int(ring.header[slot, 1])))
+            seq += 1
+    finally:
+        try:
+            cam.stop_camera()
+            _put_latest(meta_queue, ("health", cam.health()))
+        finally:
+            if ring is not None:
+                # Give the reader a moment to detach before the block goes away
+                stop_event.wait(0.2)
+                ring.close()
+
+
+def _put_latest(meta_queue, item):
+    try:
+        meta_queue.put_nowait(item)
+    except queue.Full:
+        pass  # reader is behind, it will pick up a later frame
+
+
+class SharedFrameSource:
+    """
+    Drop-in replacement for CameraFeed in process-split mode: decode runs
+    in a separate capture process, and read_frame() returns zero-copy
+    views into the shared ring. A returned frame stays valid until the
+    next read_frame() call, however long inference takes on it, also when
+    the source changes resolution in between, and until stop_camera(),
+    which unmaps the ring: only call it once the thread reading frames has
+    exited (interrupt() is safe at any time).
+    """
+
+    def __init__(self, source=0, loop=False, slots=8, media_start=None):
+        self.source = source
+        self.loop = loop
+        self.slots = slots
+        self.media_start = media_start
+        self.frame_time = None  # epoch seconds of the last frame returned
+        self.lossless = isinstance(source, str) and "://" not in source  # video file
+        # Not fork: the server process already runs Flask, export, dispatcher
+        # and reloader threads, whose locks a forked child could inherit held.
+        # The spawned child imports the parent's __main__ module (main.py under
+        # another name), which therefore builds no models at import time.
+        self.ctx = mp.get_context("spawn")
+        self.meta_queue = None
+        self.stop_event = None
+        self.process = None
+        self.ring_lock = None
+        self.ring = None
+        self.retired_ring = None  # previous ring, open until the next read_frame()
+        self.is_opened = False
+        # Same fields as CameraFeed.health() until the capture process reports
+        self.last_health = {"source": str(source), "state": "connecting", "in_state_for": 0.0,
+                            "time_in_state": {}, "reconnects": 0, "failed_attempts": 0, "last_error": None}
+        self.last_seq = -1
+        self.dropped = 0  # frames the reader skipped or found overwritten
+
+    @property
+    def state(self):
+        return self.last_health.get("state", "connecting")
+
+    def start_camera(self):
+        self.meta_queue = self.ctx.Queue(maxsize=self.slots * 4)
+        self.stop_event = self.ctx.Event()
+        self.ring_lock = self.ctx.Lock()
+        self.process = self.ctx.Process(
+            target=capture_process,
+            args=(self.source, self.loop, self.slots, self.meta_queue, self.stop_event, 1.0, self.media_start,
+                  self.ring_lock),
+            name=f"capture-{self.source}",
+            daemon=True
+        )
+        self.process.start()
+        self.is_opened = True
+        print(f"Capture process started for {self.source} (pid {self.process.pid})")
+        return True
+
+    def _handle(self, msg):
+        """Process one metadata message, return (slot, seq, frame time ns) for frames"""
+        kind = msg[0]
+        if kind == "health":
+            self.last_health = msg[1]
+        elif kind == "ring":
+            _, name, shape, dtype, slots = msg
+            if self.ring is not None:
+                # The caller may still hold the last frame from the current
+                # ring; a ring that arrived during this read was never read from
+                if self.retired_ring is None:
+                    self.retired_ring = self.ring
+                else:
+                    self.ring.close()
+            self.ring = FrameRing(shape, slots=slots, dtype=dtype, name=name, lock=self.ring_lock)
+        elif kind == "frame":
+            return msg[1], msg[2], msg[3]
+        return None
+
+    def read_frame(self, timeout=0.5):
+        if self.process is None:
+            return False, None
+        if self.retired_ring is not None:
+            # The previous read's frame is released now, and with it the old ring
+            self.retired_ring.close()
+            self.retired_ring = None
+
+        # Live sources: drain what's queued and keep only the newest frame.
+        # Files: take frames in order, the writer is waiting on us.
+        latest = None
+        try:
+            while latest is None or not self.lossless:
+                got = self._handle(self.meta_queue.get_nowait())
+                if got is not None:
+                    if latest is not None:
+                        self.dropped += 1
+                    latest = got
+        except queue.Empty:
+            pass
+
+        if latest is None:
+            try:
+                latest = self._handle(self.meta_queue.get(timeout=timeout))
+            except queue.Empty:
+                return False, None
+            if latest is None:
+                return False, None
+
+        slot, seq, frame_ns = latest
+        frame = self.ring.hold(slot, seq) if self.ring is not None else None
+        if frame is None:
+            self.dropped += 1
+            return False, None
+        self.last_seq = seq
+        self.frame_time = frame_ns / 1e9
+        return True, frame
+
+    def health(self):
+        health = dict(self.last_health)
+        health["process_alive"] = self.process is not None and self.process.is_alive()
+        health["dropped_frames"] = self.dropped
+        return health
+
+    def interrupt(self):
+        """Ask the capture process to stop without unmapping frames the reader may still hold"""
+        if self.stop_event is not None:
+            self.stop_event.set()
+
+    def stop_camera(self):
+        """Stop the capture process and unmap the ring; the reading thread must have exited"""
+        if self.stop_event is not None:
+            self.stop_event.set()
+        if self.process is not None:
+            self.process.join(3.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(1.0)
+        for ring in (self.retired_ring, self.ring):
+            if ring is not None:
+                ring.close()
+        self.ring = self.retired_ring = None
+        self.is_opened = False
+        print("Capture process stopped")
+
+    def get_frame_info(self):
+        if self.ring is None:
+            return 0, 0, 0
+        height, width = self.ring.shape[:2]
+        return width, height, 0
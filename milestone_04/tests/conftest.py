@@ -0,0 +1,6 @@
+# tests/conftest.py
+# Run from milestone_04:  python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
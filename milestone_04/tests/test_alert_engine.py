@@ -0,0 +1,31 @@
+# tests/test_alert_engine.py
+from dashboard.alert_engine import AlertEngine
+
+
+def test_clock_jumping_back_starts_a_new_timeline():
+    engine = AlertEngine(global_threshold=5, min_duration=2.0)
+    assert engine.update({1: 9}, now=1000.0) == ()
+    assert engine.update({1: 9}, now=1003.0) == (1,)
+
+    # Next video starts an hour earlier: the old alert can't carry over...
+    assert engine.update({1: 9}, now=-2600.0 + 1000) == ()
+    assert [e["event"] for e in engine.pop_new_events()] == ["raised", "cleared"]
+    # ...and a new one needs min_duration of the new footage
+    assert engine.update({1: 9}, now=-2600.0 + 1001) == ()
+    assert engine.update({1: 9}, now=-2600.0 + 1002) == (1,)
+
+
+def test_small_clock_steps_are_tolerated():
+    engine = AlertEngine(global_threshold=5, min_duration=2.0)
+    engine.update({1: 9}, now=1000.0)
+    engine.update({1: 9}, now=999.5)  # e.g. an NTP correction
+    assert engine.update({1: 9}, now=1002.0) == (1,)
+
+
+def test_reset_clears_pending_and_active():
+    engine = AlertEngine(global_threshold=5, min_duration=0.0)
+    engine.update({1: 9, 2: 9}, now=10.0)
+    engine.update({2: 9}, now=10.0)
+    engine.reset(now=11.0)
+    assert engine.active == {} and engine.over_since == {}
+    assert engine.update({1: 0}, now=50.0) == ()
@@ -0,0 +1,110 @@
+# tests/test_alert_sinks.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from dashboard.alert_sinks import EventDispatcher, JsonlSink, WebhookSink
+
+
+@pytest.fixture
+def stub_server():
+    """Local webhook that answers every POST with server.status and counts the requests"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.server.requests += 1
+            self.send_response(self.server.status)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    server.requests = 0
+    server.status = 200
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/hook"
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_dead_webhook_does_not_stall_other_sinks(stub_server, tmp_path):
+    stub_server.status = 503
+    path = tmp_path / "alerts.jsonl"
+    dispatcher = EventDispatcher([WebhookSink(url(stub_server)), JsonlSink(str(path))],
+                                 flush_interval=0.05, max_retries=5, backoff=1.0, max_backoff=30.0)
+    try:
+        for i in range(3):
+            dispatcher.publish({"event": "raised", "n": i})
+        # The webhook is backing off for seconds; the file sink must not wait for it
+        assert wait_for(lambda: path.exists() and len(path.read_text().splitlines()) == 3, timeout=1.0)
+        assert [json.loads(line)["n"] for line in path.read_text().splitlines()] == [0, 1, 2]
+        assert dispatcher.sink_stats[1]["delivered"] == 3
+        assert dispatcher.sink_stats[0]["delivered"] == 0
+    finally:
+        dispatcher.stop(timeout=1.0)
+
+
+def test_client_error_is_not_retried(stub_server):
+    stub_server.status = 400
+    dispatcher = EventDispatcher([WebhookSink(url(stub_server))], flush_interval=0.05, backoff=0.01)
+    try:
+        dispatcher.publish({"event": "raised"})
+        assert wait_for(lambda: dispatcher.stats["failed"] == 1)
+        time.sleep(0.1)
+        assert stub_server.requests == 1
+    finally:
+        dispatcher.stop(timeout=1.0)
+
+
+def test_server_error_is_retried(stub_server):
+    stub_server.status = 500
+    dispatcher = EventDispatcher([WebhookSink(url(stub_server))], flush_interval=0.05,
+                                 max_retries=2, backoff=0.01)
+    try:
+        dispatcher.publish({"event": "raised"})
+        assert wait_for(lambda: dispatcher.stats["failed"] == 1)
+        assert stub_server.requests == 3
+    finally:
+        dispatcher.stop(timeout=1.0)
+
+
+def test_full_queue_drops_oldest(tmp_path):
+    class Blocked:
+        def __init__(self):
+            self.release = threading.Event()
+            self.batches = []
+
+        def send(self, batch):
+            self.release.wait(5)
+            self.batches.append(batch)
+
+    sink = Blocked()
+    dispatcher = EventDispatcher([sink], max_queue=2, batch_size=1, flush_interval=0.05)
+    try:
+        dispatcher.publish({"n": 0})
+        assert wait_for(lambda: dispatcher.depth() == 0)  # n=0 is being sent
+        for i in range(1, 5):
+            dispatcher.publish({"n": i})
+        assert dispatcher.stats["dropped"] == 2
+        sink.release.set()
+        assert wait_for(lambda: dispatcher.stats["delivered"] == 3)
+        assert [b[0]["n"] for b in sink.batches] == [0, 3, 4]
+    finally:
+        dispatcher.stop(timeout=1.0)
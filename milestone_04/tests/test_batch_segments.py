@@ -0,0 +1,64 @@
+# tests/test_batch_segments.py
+import cv2
+import numpy as np
+import pytest
+
+import batch
+from benchmarks.scenes import SyntheticScene, make_zones, make_lines
+from detection.structs import DETECTION_DTYPE
+from zones import ZoneManager
+
+WIDTH, HEIGHT, FPS, FRAMES = 320, 240, 10.0, 240
+
+
+class FrameIndexDetector:
+    """Ground-truth boxes of the frame whose index is painted in its top-left corner"""
+
+    def __init__(self, boxes_per_frame):
+        self.boxes_per_frame = boxes_per_frame
+
+    def detect(self, frame):
+        boxes = self.boxes_per_frame[int(round(frame[:8, :8].mean()))]
+        dets = np.empty(len(boxes), DETECTION_DTYPE)
+        dets["box"] = boxes
+        dets["conf"] = 0.9
+        dets["cls"] = 0
+        return dets
+
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("batch") / "scene.avi")
+    scene = SyntheticScene(WIDTH, HEIGHT, people=8, seed=3)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, (WIDTH, HEIGHT))
+    boxes = []
+    for i, (frame, frame_boxes) in enumerate(scene.frames(FRAMES)):
+        frame[:8, :8] = i
+        writer.write(frame)
+        boxes.append(frame_boxes)
+    writer.release()
+    return path, boxes
+
+
+@pytest.fixture
+def manager(monkeypatch, clip):
+    manager = ZoneManager()
+    manager.zones = make_zones(WIDTH, HEIGHT)
+    manager.lines = make_lines(WIDTH, HEIGHT)
+    monkeypatch.setattr(batch, "_detector", FrameIndexDetector(clip[1]))
+    monkeypatch.setattr(batch, "load_layout", lambda: manager)
+    return manager
+
+
+@pytest.mark.parametrize("segments", [2, 3, 6])
+def test_stitched_segments_match_single_pass(clip, manager, segments):
+    path = clip[0]
+    single = batch.count_video(path, batch._detector, manager)
+
+    plan, overlap = batch.plan_segments(path, segments, overlap_seconds=1.0)
+    assert len(plan) == segments
+    parts = [batch.process_segment(path, start, end, overlap) for start, end in plan]
+    rows, _ = batch.stitch_segments(parts, manager)
+
+    assert sum(part["frames"] for part in parts) == single["frames"] == FRAMES
+    assert rows == single["rows"]
@@ -0,0 +1,23 @@
+# tests/test_data_manager.py
+import pytest
+
+from dashboard.data_manager import DataManager
+
+
+@pytest.fixture
+def dm():
+    dm = DataManager()
+    dm.initialize()
+    return dm
+
+
+def test_api_thresholds_survive_zone_reloads(dm):
+    dm.replace_zone_thresholds({1: 10, 2: 10, "door:in": 3})
+    dm.set_zone_threshold(1, 4)
+    dm.replace_zone_thresholds({1: 12, 2: 12})  # zones.json edited, door threshold removed
+    assert dm.snapshot.zone_thresholds == {1: 4, 2: 12}
+
+    dm.set_zone_threshold(1, None)  # back to the file value
+    assert dm.snapshot.zone_thresholds == {1: 12, 2: 12}
+    dm.replace_zone_thresholds({})
+    assert dm.alert_engine.threshold_for(1) == dm.global_threshold
@@ -0,0 +1,41 @@
+# tests/test_detector_pool.py
+import os
+
+import numpy as np
+import pytest
+
+from detection.detector_pool import DetectorPool
+from detection.structs import DETECTION_DTYPE
+
+
+class CrashingDetector:
+    """Returns one detection per frame, exits the process on a frame whose first byte is 255"""
+
+    def detect(self, frame):
+        if frame.flat[0] == 255:
+            os._exit(3)
+        return np.zeros(1, DETECTION_DTYPE)
+
+
+@pytest.fixture(params=["fork", "spawn"])
+def pool(request):
+    pool = DetectorPool(workers=2, detector_factory=CrashingDetector, start_method=request.param)
+    yield pool
+    pool.shutdown()
+
+
+def test_dead_worker_fails_its_frame_and_is_replaced(pool):
+    ok = np.zeros((8, 8, 3), np.uint8)
+    bad = ok.copy()
+    bad.flat[0] = 255
+
+    assert len(pool.detect(ok)) == 1
+    with pytest.raises(RuntimeError, match="exited"):
+        pool.submit(bad).result(timeout=10)
+
+    futures = [pool.submit(ok) for _ in range(10)]
+    assert all(len(f.result(timeout=10)) == 1 for f in futures)
+    assert pool.depth() == 0
+    stats = pool.stats()
+    assert stats["restarts"] == 1
+    assert all(w["alive"] for w in stats["per_worker"])
@@ -0,0 +1,47 @@
+# tests/test_line_counter.py
+import pytest
+
+from detection.line_counter import LineCounter
+from detection.structs import make_tracks
+
+LINE = {"id": "door", "points": [[0, 100], [200, 100]]}
+
+
+def walk(counter, ys, x=50, track_id=1):
+    """Feed one track whose bottom-centre anchor goes through the given y values"""
+    for y in ys:
+        counter.update(make_tracks([[x - 10, y - 40, x + 10, y]], [track_id]))
+    return counter.get_counts()["door"]
+
+
+@pytest.mark.parametrize("ys", [[90, 110], [90, 100, 110], [90, 95, 100, 100, 105, 110]])
+def test_crossing_is_counted_once(ys):
+    assert walk(LineCounter([LINE]), ys) == {"in": 1, "out": 0}
+
+
+@pytest.mark.parametrize("ys", [[110, 90], [110, 100, 90]])
+def test_reverse_crossing_counts_out(ys):
+    assert walk(LineCounter([LINE]), ys) == {"in": 0, "out": 1}
+
+
+def test_stopping_on_the_line_then_leaving_on_the_same_side():
+    assert walk(LineCounter([LINE]), [90, 100, 90]) == {"in": 1, "out": 1}
+    assert walk(LineCounter([LINE]), [110, 100, 110]) == {"in": 0, "out": 0}
+
+
+def test_passing_beside_the_line_does_not_count():
+    assert walk(LineCounter([LINE]), [90, 110], x=250) == {"in": 0, "out": 0}
+
+
+def test_line_alerts_use_windowed_rate_and_explicit_thresholds():
+    from dashboard.data_manager import DataManager
+    dm = DataManager()
+    dm.initialize()
+    dm.set_zone_threshold("door:in", 5)
+    for t in range(60):
+        dm.update_counts({}, 0, lines={"door": {"in": t, "out": t}}, timestamp=1000.0 + t * 10)
+    # ~6 crossings a minute in each direction: only "in" has a threshold
+    assert dm.snapshot.alerts == ("door:in",)
+    for t in range(60, 80):
+        dm.update_counts({}, 0, lines={"door": {"in": 59, "out": 59}}, timestamp=1000.0 + t * 10)
+    assert dm.snapshot.alerts == ()
@@ -0,0 +1,42 @@
+# tests/test_recording.py
+import json
+import os
+
+import numpy as np
+import pytest
+
+from detection.recording import META_FILE, DetectionRecorder, DetectionReplay
+
+
+def _record(path, frames, fail_at=None):
+    with DetectionRecorder(path, chunk_frames=4) as recorder:
+        for i in range(frames):
+            if i == fail_at:
+                raise RuntimeError("decoder died")
+            recorder.add(i, i / 30.0, np.array([[0, 0, 10, 20, 0.9, 0]], np.float32))
+
+
+def test_round_trip(tmp_path):
+    _record(str(tmp_path / "rec"), 10)
+    replay = DetectionReplay(str(tmp_path / "rec"))
+    assert len(replay) == 10
+    assert [frame for frame, _, _, _ in replay] == list(range(10))
+
+
+def test_failed_recording_is_refused(tmp_path):
+    path = str(tmp_path / "rec")
+    with pytest.raises(RuntimeError):
+        _record(path, 10, fail_at=6)
+    with open(os.path.join(path, META_FILE)) as f:
+        assert json.load(f)["complete"] is False
+    with pytest.raises(ValueError, match="incomplete"):
+        DetectionReplay(path)
+    assert len(list(DetectionReplay(path, partial=True))) == 6
+
+
+def test_recording_without_meta_is_refused(tmp_path):
+    path = str(tmp_path / "rec")
+    _record(path, 10)
+    os.remove(os.path.join(path, META_FILE))
+    with pytest.raises(ValueError, match="incomplete"):
+        DetectionReplay(path)
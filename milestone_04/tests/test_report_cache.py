@@ -0,0 +1,41 @@
+# tests/test_report_cache.py
+import threading
+
+from utils.export_jobs import ExportJobManager
+from utils.report_cache import ReportCache
+
+
+def _history(start, frames):
+    return [{"ts": start + i / 10.0, "time": "", "total": 1, "zones": {1: 1}} for i in range(frames)]
+
+
+def test_key_is_stable_while_the_history_grows_within_an_interval():
+    history = _history(1000.0, 100)   # 1000.0 .. 1009.9
+    grown = _history(1000.0, 150)     # a few seconds later, same minute
+    assert ReportCache.make_key("pdf", history, {"interval": 60}, resolution=60) == \
+        ReportCache.make_key("pdf", grown, {"interval": 60}, resolution=60)
+
+    later = _history(1000.0, 900)     # runs into the next minute
+    assert ReportCache.make_key("pdf", history, resolution=60) != ReportCache.make_key("pdf", later, resolution=60)
+
+
+def test_growing_history_hits_the_cache_and_the_running_job(tmp_path):
+    jobs = ExportJobManager(export_dir=str(tmp_path), cache=ReportCache(cache_dir=str(tmp_path)))
+    release = threading.Event()
+    runs = []
+
+    def render(path, progress):
+        runs.append(path)
+        release.wait(5)
+        with open(path, "w") as f:
+            f.write("report")
+
+    first = jobs.submit("csv", render, key=ReportCache.make_key("csv", _history(1000.0, 100), resolution=60))
+    second = jobs.submit("csv", render, key=ReportCache.make_key("csv", _history(1000.0, 120), resolution=60))
+    assert second == first  # deduplicated while running
+    release.set()
+    jobs.executor.shutdown(wait=True)
+
+    third = jobs.submit("csv", render, key=ReportCache.make_key("csv", _history(1000.0, 140), resolution=60))
+    assert jobs.get_status(third)["cached"]
+    assert len(runs) == 1
@@ -0,0 +1,58 @@
+# tests/test_report_generator.py
+import os
+import time
+
+import pytest
+
+from utils.report_generator import aggregate_history, choose_interval
+
+
+@pytest.fixture
+def kolkata():
+    """UTC+05:30, so UTC-aligned hours would start at HH:30 local"""
+    old = os.environ.get("TZ")
+    os.environ["TZ"] = "Asia/Kolkata"
+    time.tzset()
+    yield
+    if old is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = old
+    time.tzset()
+
+
+def _entries(start, minutes, total=1):
+    return [{"ts": start + i * 60, "time": "", "total": total, "zones": {1: total}} for i in range(minutes)]
+
+
+def test_buckets_start_on_the_local_hour(kolkata):
+    start = time.mktime((2024, 5, 1, 8, 0, 0, 0, 0, -1))  # 08:00 local
+    agg = aggregate_history(_entries(start, 150), interval=3600)
+    assert [row["start"] for row in agg["intervals"]] == ["08:00:00", "09:00:00", "10:00:00"]
+
+
+def test_backwards_timestamps_are_put_in_order(kolkata):
+    day = time.mktime((2024, 5, 1, 10, 0, 0, 0, 0, -1))
+    earlier = time.mktime((2024, 5, 1, 8, 0, 0, 0, 0, -1))
+    history = _entries(day, 30, total=5) + _entries(earlier, 30, total=1)  # second video starts earlier
+
+    agg = aggregate_history(history, interval=3600)
+    assert [row["start"] for row in agg["intervals"]] == ["08:00:00", "10:00:00"]
+    assert [row["total"][2] for row in agg["intervals"]] == [1, 5]
+    assert choose_interval(history) == 300  # 2.5 h span, not negative
+
+
+def test_breaches_follow_the_alert_rules():
+    # Cumulative entries only grow; occupancy goes over zone 1's own limit twice
+    occupancy = [1, 6, 7, 5, 4, 6, 2]
+    history = [{"ts": 1000.0 + i, "time": "", "total": 10 + i, "zones": {1: 10 + i, 2: 10 + i},
+                "occupancy": {1: occ, 2: 0}}
+               for i, occ in enumerate(occupancy)]
+
+    agg = aggregate_history(history, interval=60, threshold=20, zone_thresholds={1: 5}, exit_margin=1)
+    # 6 > 5 raises, 5 stays (above 5 - 1), 4 clears, 6 raises again; zone 2 never exceeds 20
+    assert agg["summary"][1]["breaches"] == 2
+    assert agg["summary"][2]["breaches"] == 0
+
+    by_entries = aggregate_history(history, interval=60, threshold=12, breach_source="entries")
+    assert by_entries["summary"][1]["breaches"] == 1
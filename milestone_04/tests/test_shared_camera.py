@@ -0,0 +1,40 @@
+# tests/test_shared_camera.py
+import queue
+
+import numpy as np
+
+from shared_camera import FrameRing, SharedFrameSource
+
+
+def test_frame_stays_valid_across_resolution_change():
+    # Stand in for the capture process: rings and metadata are fed directly
+    source = SharedFrameSource(source="clip.avi")
+    source.meta_queue = queue.Queue()
+    source.process = object()
+    small = FrameRing((4, 4, 3), slots=3, create=True)
+    large = FrameRing((8, 8, 3), slots=3, create=True)
+    try:
+        small.write(0, np.full((4, 4, 3), 7, np.uint8), 1)
+        source.meta_queue.put(("ring", small.name, (4, 4, 3), "uint8", 3))
+        source.meta_queue.put(("frame", 0, 0, 1))
+        ok, frame = source.read_frame()
+        assert ok and frame.shape == (4, 4, 3)
+
+        # New resolution: the old ring must stay mapped while the caller holds its frame
+        large.write(1, np.full((8, 8, 3), 9, np.uint8), 2)
+        source.meta_queue.put(("ring", large.name, (8, 8, 3), "uint8", 3))
+        source.meta_queue.put(("frame", 0, 1, 2))
+        source._handle(source.meta_queue.get())
+        assert source.retired_ring is not None
+        assert int(frame.sum()) == 7 * 48
+
+        del frame
+        ok, frame = source.read_frame()
+        assert ok and frame.shape == (8, 8, 3) and int(frame[0, 0, 0]) == 9
+        assert source.retired_ring is None
+        del frame
+    finally:
+        source.process = None
+        source.stop_camera()
+        small.close()
+        large.close()
@@ -0,0 +1,72 @@
+# tests/test_tracker.py
+import numpy as np
+import pytest
+
+from detection.tracker import IoUTracker, create_tracker, match
+
+
+def dets(*boxes, conf=0.9):
+    """[x1, y1, x2, y2, conf, class_id] rows for the given boxes"""
+    return [[*box, conf, 0] for box in boxes]
+
+
+def walkers(frame):
+    """Two people walking in opposite directions, 5 px per frame"""
+    return dets([10 + 5 * frame, 50, 50 + 5 * frame, 150], [400 - 5 * frame, 60, 440 - 5 * frame, 160])
+
+
+@pytest.mark.parametrize("use_hungarian", [True, False])
+def test_ids_persist_across_frames(use_hungarian):
+    tracker = IoUTracker(min_hits=1, use_hungarian=use_hungarian)
+    first = tracker.update(walkers(0))
+    ids = dict(zip(first["box"][:, 0].tolist(), first["id"].tolist()))
+    left, right = ids[10], ids[400]
+    assert left != right
+    for frame in range(1, 20):
+        tracks = tracker.update(walkers(frame))
+        by_x = dict(zip(tracks["box"][:, 0].round().tolist(), tracks["id"].tolist()))
+        assert by_x == {10 + 5 * frame: left, 400 - 5 * frame: right}
+
+
+def test_track_needs_min_hits_before_it_is_reported():
+    tracker = IoUTracker(min_hits=3)
+    assert len(tracker.update(walkers(0))) == 0
+    assert len(tracker.update(walkers(1))) == 0
+    assert len(tracker.update(walkers(2))) == 2
+
+
+def test_track_is_dropped_after_max_age():
+    tracker = IoUTracker(min_hits=1, max_age=3)
+    box = [100, 100, 140, 200]
+    track_id = tracker.update(dets(box))["id"][0]
+
+    for _ in range(3):  # occluded, but within max_age
+        assert len(tracker.update(dets())) == 0
+    assert tracker.update(dets(box))["id"].tolist() == [track_id]
+
+    for _ in range(4):  # gone for longer than max_age
+        tracker.update(dets())
+    assert len(tracker.ids) == 0
+    assert tracker.update(dets(box))["id"].tolist() == [track_id + 1]
+
+
+def test_low_confidence_detections_keep_tracks_alive_but_never_start_them():
+    tracker = IoUTracker(min_hits=1, max_age=1)
+    box = [100, 100, 140, 200]
+    track_id = tracker.update(dets(box))["id"][0]
+    for _ in range(5):
+        assert tracker.update(dets(box, conf=0.4))["id"].tolist() == [track_id]
+    assert len(IoUTracker(min_hits=1).update(dets(box, conf=0.4))) == 0
+
+
+def test_match_respects_the_threshold():
+    iou = np.array([[0.9, 0.1], [0.2, 0.25]])
+    matches, rows, cols = match(iou, threshold=0.3)
+    assert matches.tolist() == [[0, 0]]
+    assert rows.tolist() == [1] and cols.tolist() == [1]
+
+
+def test_embed_mode_is_only_accepted_for_deepsort():
+    with pytest.raises(ValueError, match="deepsort"):
+        create_tracker("iou", embed_mode="on_demand")
+    assert isinstance(create_tracker("iou", embed_mode=None), IoUTracker)
@@ -0,0 +1,48 @@
+# tests/test_zone_reloader.py
+import json
+import time
+
+import pytest
+
+import zones as zones_module
+from detection.structs import make_tracks
+from zone_reloader import ZoneReloader
+
+SQUARE = {"id": 1, "name": "Door", "points": [[0, 0], [100, 0], [100, 100], [0, 100]]}
+
+
+@pytest.fixture
+def zones_file(tmp_path, monkeypatch):
+    path = tmp_path / "zones.json"
+    monkeypatch.setattr(zones_module, "ZONES_FILE", str(path))
+
+    def write(**data):
+        path.write_text(json.dumps(dict({"zones": [SQUARE], "lines": []}, **data)))
+    return write
+
+
+def test_counting_section_sets_window_and_ttl(zones_file):
+    zones_file(counting={"window": "hourly", "ttl": 60})
+    counter = ZoneReloader().build()["counter"]
+    assert counter.window == "hourly"
+    assert counter.ttl == 60.0
+
+    # 08:59 -> 09:01 local: the first hour is closed into the history
+    t0 = time.mktime((2024, 5, 1, 8, 59, 0, 0, 0, -1))
+    counter.update(make_tracks([[40, 40, 60, 50]], [7]), now=t0)
+    counter.update(make_tracks([[40, 40, 60, 50]], [8]), now=t0 + 120)
+    windows = counter.get_windows()
+    assert windows["current"] == "2024-05-01 09:00"
+    assert windows["history"] == [{"window": "2024-05-01 08:00", "zones": {1: 1}}]
+
+
+def test_without_counting_section_the_defaults_apply(zones_file):
+    zones_file()
+    counter = ZoneReloader().build()["counter"]
+    assert counter.window is None and counter.get_windows() is None
+
+
+def test_bad_window_fails_the_reload(zones_file):
+    zones_file(counting={"window": "weekly"})
+    with pytest.raises(ValueError, match="window"):
+        ZoneReloader().build()
@@ -0,0 +1,120 @@
+# utils/export_jobs.py
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class ExportJobManager:
+    """
+    Runs CSV/PDF exports on a small worker pool so heavy reports never
+    block a Flask request thread. Identical concurrent requests share one job,
+    and with a ReportCache an unchanged request reuses the existing file.
+    """
+
+    def __init__(self, export_dir="dashboard/exports", max_workers=2, max_jobs=100, cache=None):
+        self.export_dir = export_dir
+        self.max_jobs = max_jobs
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self.jobs = {}          # job_id -> job dict
+        self.active_keys = {}   # dedup key -> job_id of a queued/running job
+        self.lock = threading.Lock()
+        os.makedirs(self.export_dir, exist_ok=True)
+
+    def submit(self, kind, func, key=None, ext=None):
+        """
+        kind: 'pdf' or 'csv'
+        func: callable(filepath, progress_cb) that writes the export to filepath
+        key: jobs with the same key share one run while it is queued/running;
+             with a cache, the key is also the content address of the file
+        Returns the job id.
+        """
+        ext = ext or kind
+        with self.lock:
+            if key is not None and key in self.active_keys:
+                return self.active_keys[key]
+
+            job_id = uuid.uuid4().hex
+            cached = None
+            if self.cache is not None and key is not None:
+                cached = self.cache.get(key, ext)
+                filename = cached or self.cache.filename_for(key, ext)
+            else:
+                filename = f"crowd_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job_id[:8]}.{ext}"
+
+            self.jobs[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "status": "done" if cached else "queued",
+                "progress": 100 if cached else 0,
+                "filename": filename,
+                "error": None,
+                "cached": bool(cached),
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "key": key,
+            }
+            if cached:
+                self._prune()
+                return job_id
+            if key is not None:
+                self.active_keys[key] = job_id
+            self._prune()
+
+        self.executor.submit(self._run, job_id, func)
+        return job_id
+
+    def _run(self, job_id, func):
+        job = self.jobs[job_id]
+        job["status"] = "running"
+        filepath = os.path.join(self.export_dir, job["filename"])
+
+        def progress_cb(fraction):
+            job["progress"] = int(max(0.0, min(1.0, fraction)) * 100)
+
+        tmp_path = filepath + ".part"
+        try:
+            func(tmp_path, progress_cb)
+            os.replace(tmp_path, filepath)  # readers never see a half-written file
+            if self.cache is not None and job["key"] is not None:
+                self.cache.put(job["filename"], pinned=self._live_files())
+            job["progress"] = 100
+            job["status"] = "done"
+        except Exception as e:
+            print(f"Export job {job_id} failed: {e}")
+            job["error"] = str(e)
+            job["status"] = "failed"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            with self.lock:
+                if self.active_keys.get(job["key"]) == job_id:
+                    del self.active_keys[job["key"]]
+
+    def _live_files(self):
+        """Files of queued and running jobs, which the cache must not evict"""
+        with self.lock:
+            return {job["filename"] for job in self.jobs.values() if job["status"] in ("queued", "running")}
+
+    def _prune(self):
+        """Forget the oldest finished jobs once more than max_jobs are tracked"""
+        finished = [jid for jid, job in self.jobs.items() if job["status"] in ("done", "failed")]
+        while len(self.jobs) > self.max_jobs and finished:
+            del self.jobs[finished.pop(0)]
+
+    def get_status(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job["status"] == "done" and not os.path.exists(os.path.join(self.export_dir, job["filename"])):
+            # Evicted from the cache after the job finished
+            job["status"] = "failed"
+            job["error"] = "Report file is no longer available, please export again"
+        status = {k: v for k, v in job.items() if k != "key"}
+        if job["status"] != "done":
+            status["filename"] = None
+        return status
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
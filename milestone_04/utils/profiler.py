@@ -0,0 +1,131 @@
+# utils/profiler.py
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+MODES = ("cprofile", "sample")
+
+
+class LoopProfiler:
+    """
+    On-demand profiling of the processing thread.
+    "cprofile": the loop calls tick() once per frame while a session is
+    active (it checks the plain `active` flag, so nothing runs when idle);
+    the profiler is enabled and dumped from that thread and saved as a
+    .pstats file. "sample": a side thread samples the processing thread's
+    stack every interval and writes collapsed stacks for flame graphs.
+    Optionally the per-frame stage timings are traced to JSONL meanwhile.
+    """
+
+    def __init__(self, output_dir, metrics=None, sample_interval=0.005):
+        self.output_dir = output_dir
+        self.metrics = metrics
+        self.sample_interval = sample_interval
+        self.active = False
+        self.session = None
+        self.lock = threading.Lock()
+
+    def start(self, seconds, mode="cprofile", thread=None, trace=False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode '{mode}', expected one of {', '.join(MODES)}")
+        if mode == "sample" and (thread is None or thread.ident is None):
+            raise ValueError("Processing thread is not running")
+        with self.lock:
+            if self.session is not None:
+                raise RuntimeError("A profile is already running")
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            ext = "pstats" if mode == "cprofile" else "folded"
+            session = {
+                "mode": mode,
+                "seconds": seconds,
+                "profile_file": f"profile_{stamp}.{ext}",
+                "trace_file": f"trace_{stamp}.jsonl" if trace else None,
+                "stop": False,
+                "running": False,
+                "frames": 0,
+                "done": threading.Event(),
+            }
+            self.session = session
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        if trace and self.metrics is not None:
+            self.metrics.start_trace(os.path.join(self.output_dir, session["trace_file"]))
+        if mode == "cprofile":
+            session["profile"] = cProfile.Profile()
+            self.active = True
+        else:
+            threading.Thread(target=self._sample, args=(session, thread.ident),
+                             name="loop-sampler", daemon=True).start()
+        return session
+
+    def tick(self):
+        """Called by the processing thread at the top of each frame while active"""
+        session = self.session
+        if session is None or session["mode"] != "cprofile":
+            self.active = False
+            return
+        if session["stop"]:
+            self.active = False
+            if session["running"]:
+                session["profile"].disable()
+                session["profile"].dump_stats(os.path.join(self.output_dir, session["profile_file"]))
+            session["done"].set()
+            with self.lock:
+                if self.session is session:
+                    self.session = None
+        elif not session["running"]:
+            session["profile"].enable()
+            session["running"] = True
+        else:
+            session["frames"] += 1
+
+    def _sample(self, session, ident):
+        stacks = Counter()
+        session["running"] = True
+        while not session["stop"]:
+            frame = sys._current_frames().get(ident)
+            if frame is not None:
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stacks[";".join(reversed(names))] += 1
+            time.sleep(self.sample_interval)
+        session["frames"] = sum(stacks.values())  # samples, for the response
+        with open(os.path.join(self.output_dir, session["profile_file"]), "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        session["done"].set()
+
+    def run(self, seconds, mode="cprofile", thread=None, trace=False, grace=5.0):
+        """Profile for `seconds` and block until the files are written"""
+        session = self.start(seconds, mode, thread, trace)
+        try:
+            time.sleep(seconds)
+            session["stop"] = True
+            if self.metrics is not None and trace:
+                self.metrics.stop_trace()
+            # cProfile is dumped by the loop on its next frame
+            if not session["done"].wait(grace):
+                raise TimeoutError("Processing loop made no progress, nothing was profiled")
+            return {
+                "mode": mode,
+                "seconds": seconds,
+                "frames" if mode == "cprofile" else "samples": session["frames"],
+                "profile": session["profile_file"],
+                "trace": session["trace_file"],
+            }
+        finally:
+            session["stop"] = True
+            if self.metrics is not None and trace:
+                self.metrics.stop_trace()
+            # A stalled loop may still own an enabled cProfile: its next tick() clears the session
+            if session["done"].is_set() or mode == "sample" or not session["running"]:
+                with self.lock:
+                    if self.session is session:
+                        self.session = None
@@ -0,0 +1,91 @@
+# utils/report_cache.py
+import hashlib
+import json
+import os
+import threading
+
+
+class ReportCache:
+    """
+    Content-addressed cache of generated reports in the exports folder.
+    Files are named report_<key>.<ext>, so an unchanged request maps to the
+    file that already exists. Least recently used files are evicted once the
+    cache grows past max_bytes. Unfinished .part files and files pinned by
+    the caller (reports of queued or running jobs) are never evicted.
+    """
+
+    PREFIX = "report_"
+
+    def __init__(self, cache_dir="dashboard/exports", max_bytes=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(kind, history, params=None, resolution=None):
+        """
+        Hash the report kind, its parameters and the time range the history
+        covers. With a resolution (the report interval, in seconds) both ends
+        of the range are floored to it, so a live history that grows every
+        frame keeps its key until it reaches the next interval. Histories
+        without 'ts' on every entry are hashed entry by entry.
+        """
+        h = hashlib.sha256()
+        h.update(json.dumps({"kind": kind, "params": params or {}}, sort_keys=True, default=str).encode())
+        if resolution and history and all('ts' in entry for entry in history):
+            stamps = [entry['ts'] for entry in history]
+            first, last = min(stamps), max(stamps)
+            h.update(json.dumps([resolution, first - first % resolution, last - last % resolution]).encode())
+            return h.hexdigest()[:32]
+        for entry in history:
+            h.update(json.dumps(entry, sort_keys=True, default=str).encode())
+        return h.hexdigest()[:32]
+
+    def filename_for(self, key, ext):
+        return f"{self.PREFIX}{key}.{ext}"
+
+    def get(self, key, ext):
+        """Return the cached filename for key, or None. Marks it recently used."""
+        filename = self.filename_for(key, ext)
+        path = os.path.join(self.cache_dir, filename)
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(path, None)  # mtime doubles as last-used time for LRU
+        except OSError:
+            return None
+        return filename
+
+    def put(self, filename, pinned=()):
+        """Register a freshly written file and evict old entries if needed"""
+        path = os.path.join(self.cache_dir, filename)
+        if os.path.exists(path):
+            os.utime(path, None)
+        self.evict(pinned=set(pinned) | {filename})
+
+    def evict(self, pinned=()):
+        with self.lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.startswith(self.PREFIX) or name.endswith(".part"):
+                    continue
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                total += st.st_size
+                if name not in pinned:
+                    entries.append((st.st_mtime, st.st_size, path))
+
+            entries.sort()
+            # Pinned files (always the newest one) count towards the budget but stay
+            while total > self.max_bytes and entries:
+                _, size, path = entries.pop(0)
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
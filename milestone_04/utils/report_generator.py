@@ -1,43 +1,312 @@
 # utils/report_generator.py
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.widgets.markers import makeMarker
 from datetime import datetime
 import os
+import time
 
-def generate_pdf(history_data, filename="dashboard/exports/report.pdf"):
-    os.makedirs("dashboard/exports", exist_ok=True)
+ZONE_COLORS = [colors.HexColor('#007bff'), colors.HexColor('#fd7e14'),
+               colors.HexColor('#28a745'), colors.HexColor('#6f42c1')]
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.grey),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,0), (-1,-1), 8),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+    ('BACKGROUND', (0,1), (-1,-1), colors.beige)
+])
+
+
+def _entry_seconds(entry):
+    """Epoch seconds of a history entry ('ts'), or seconds of day for old 'HH:MM:SS'-only entries"""
+    if 'ts' in entry:
+        return entry['ts']
+    h, m, s = (int(x) for x in str(entry['time']).split(':'))
+    return h * 3600 + m * 60 + s
+
+
+def _fmt_seconds(seconds, epoch=False):
+    if epoch:
+        return datetime.fromtimestamp(seconds).strftime("%H:%M:%S")
+    seconds = int(seconds) % 86400
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+def _in_time_order(history_data):
+    """
+    Entries sorted by 'ts' when every entry has one. A camera switch or a
+    media_start in the past sends 'ts' backwards mid-history; reports put
+    the timeline back in order instead of mixing the runs.
+    """
+    if not all('ts' in entry for entry in history_data):
+        return history_data
+    if all(a['ts'] <= b['ts'] for a, b in zip(history_data, history_data[1:])):
+        return history_data
+    return sorted(history_data, key=lambda entry: entry['ts'])
+
+
+def _fmt_period(history_data):
+    if all('ts' in entry for entry in history_data):
+        start = datetime.fromtimestamp(min(entry['ts'] for entry in history_data))
+        end = datetime.fromtimestamp(max(entry['ts'] for entry in history_data))
+        return f"{start.strftime('%Y-%m-%d %H:%M:%S')} - {end.strftime('%Y-%m-%d %H:%M:%S')}"
+    return f"{history_data[0]['time']} - {history_data[-1]['time']}"
+
+
+def choose_interval(history_data, max_intervals=120):
+    """Smallest 'nice' bucket size (seconds) that keeps the report under max_intervals rows"""
+    if len(history_data) < 2:
+        return 1
+    if all('ts' in entry for entry in history_data):
+        stamps = [entry['ts'] for entry in history_data]
+        span = max(stamps) - min(stamps)
+    else:
+        span = _entry_seconds(history_data[-1]) - _entry_seconds(history_data[0])
+        if span < 0:
+            span += 86400
+    for step in (1, 5, 10, 30, 60, 300, 600, 900, 1800, 3600):
+        if span / step <= max_intervals:
+            return step
+    return 3600
+
+
+def aggregate_history(history_data, interval=60, threshold=None, progress_cb=None,
+                      zone_thresholds=None, exit_margin=0, breach_source="occupancy"):
+    """
+    Single pass over the history. Returns a dict with:
+      zone_ids:  sorted zone ids
+      line_keys: sorted 'line_id:in' / 'line_id:out' keys for tripwire counts
+      intervals: list of {"start", "total": (min,max,mean), "zones": {zid: (min,max,mean)},
+                          "lines": {line_key: (min,max,mean)}}
+      summary:   {zid, line_key or 'total': {"min","max","mean","peak_time","breaches"}}
+    Memory is proportional to the number of intervals, not the number of rows.
+    Entries are placed by their stored 'ts', so recorded video processed
+    faster or slower than real time still gets the footage's timeline.
+    Buckets are aligned to local time, so hourly rows start on the hour
+    in any timezone.
+    Breaches follow the alert rules: per-zone limits from zone_thresholds
+    (falling back to threshold), compared with occupancy (breach_source
+    "occupancy", as DataManager.alert_source) or the entry counts, and a
+    breach ends only once the value drops to limit - exit_margin.
+    """
+    history_data = _in_time_order(history_data)
+    zone_ids = sorted(set(zid for entry in history_data for zid in entry['zones'].keys()))
+    line_keys = sorted(set(f"{lid}:{d}" for entry in history_data for lid in entry.get('lines', {})
+                           for d in ("in", "out")), key=str)
+    keys = ['total'] + zone_ids + line_keys
+    buckets = []  # [start, {key: [min, max, sum, n]}]
+    summary = {k: {"min": None, "max": None, "sum": 0, "n": 0, "peak_time": None, "breaches": 0}
+               for k in keys}
+    in_breach = {k: False for k in zone_ids}
+    limits = {str(k): v for k, v in (zone_thresholds or {}).items()}
+    check_breaches = threshold is not None or bool(limits)
+
+    epoch = all('ts' in entry for entry in history_data)
+    day_offset = 0
+    prev_sec = None
+    n = len(history_data)
+    for i, entry in enumerate(history_data):
+        sec = entry['ts'] if epoch else _entry_seconds(entry)
+        if not epoch and prev_sec is not None and sec + day_offset < prev_sec:
+            day_offset += 86400  # labels wrapped past midnight
+        sec += day_offset
+        prev_sec = sec
+        # Align to local midnight; labels are seconds of day already
+        local = sec + time.localtime(sec).tm_gmtoff if epoch else sec
+        start = sec - local % interval
+
+        if not buckets or buckets[-1][0] != start:
+            buckets.append([start, {}])
+        stats = buckets[-1][1]
+
+        values = {'total': entry['total']}
+        for zid in zone_ids:
+            values[zid] = entry['zones'].get(zid, 0)
+        lines = entry.get('lines', {})
+        for key in line_keys:
+            lid, d = key.rsplit(':', 1)
+            values[key] = lines.get(lid, {}).get(d, 0)
+
+        for k, v in values.items():
+            s = stats.get(k)
+            if s is None:
+                stats[k] = [v, v, v, 1]
+            else:
+                s[0] = min(s[0], v)
+                s[1] = max(s[1], v)
+                s[2] += v
+                s[3] += 1
+
+            z = summary[k]
+            z["min"] = v if z["min"] is None else min(z["min"], v)
+            if z["max"] is None or v > z["max"]:
+                z["max"] = v
+                z["peak_time"] = entry['time']
+            z["sum"] += v
+            z["n"] += 1
+
+        if check_breaches:
+            alert_values = entry['zones']
+            if breach_source == "occupancy" and entry.get('occupancy'):
+                alert_values = entry['occupancy']
+            for zid in zone_ids:
+                limit = limits.get(str(zid), threshold)
+                if limit is None:
+                    continue
+                v = alert_values.get(zid, 0)
+                if not in_breach[zid] and v > limit:
+                    summary[zid]["breaches"] += 1
+                    in_breach[zid] = True
+                elif in_breach[zid] and v <= limit - exit_margin:
+                    in_breach[zid] = False
+
+        if progress_cb and i % 1000 == 0:
+            progress_cb(0.4 * i / max(n, 1))
+
+    intervals = []
+    line_set = set(line_keys)
+    for start, stats in buckets:
+        row = {"start": _fmt_seconds(start, epoch), "zones": {}, "lines": {}}
+        for k, (mn, mx, total, cnt) in stats.items():
+            agg = (mn, mx, total / cnt)
+            if k == 'total':
+                row["total"] = agg
+            elif k in line_set:
+                row["lines"][k] = agg
+            else:
+                row["zones"][k] = agg
+        intervals.append(row)
+
+    for z in summary.values():
+        z["mean"] = z["sum"] / z["n"] if z["n"] else 0
+        del z["sum"], z["n"]
+
+    return {"zone_ids": zone_ids, "line_keys": line_keys, "intervals": intervals,
+            "summary": summary, "interval": interval}
+
+
+def _chart(agg, stat_index, title, width=480, height=200):
+    """Vector line chart of one statistic (0=min, 1=max, 2=mean) per zone per interval"""
+    drawing = Drawing(width, height + 30)
+    drawing.add(String(width / 2, height + 15, title, textAnchor='middle', fontSize=10))
+    intervals = agg["intervals"]
+    if not intervals:
+        return drawing
+
+    lp = LinePlot()
+    lp.x, lp.y = 40, 20
+    lp.width, lp.height = width - 60, height - 20
+    data = []
+    for zid in agg["zone_ids"]:
+        data.append([(i, row["zones"].get(zid, (0, 0, 0))[stat_index]) for i, row in enumerate(intervals)])
+    if not data:
+        data = [[(i, row["total"][stat_index]) for i, row in enumerate(intervals)]]
+    lp.data = data
+    for i in range(len(data)):
+        lp.lines[i].strokeColor = ZONE_COLORS[i % len(ZONE_COLORS)]
+        lp.lines[i].strokeWidth = 1.2
+        if len(intervals) <= 30:
+            lp.lines[i].symbol = makeMarker('FilledCircle', size=2)
+    lp.xValueAxis.valueMin = 0
+    lp.xValueAxis.valueMax = max(len(intervals) - 1, 1)
+    step = max(1, len(intervals) // 6)
+    lp.xValueAxis.valueSteps = list(range(0, len(intervals), step))
+    lp.xValueAxis.labelTextFormat = lambda v: intervals[int(v)]["start"] if int(v) < len(intervals) else ''
+    lp.xValueAxis.labels.fontSize = 7
+    lp.yValueAxis.valueMin = 0
+    lp.yValueAxis.labels.fontSize = 7
+    drawing.add(lp)
+
+    for i, zid in enumerate(agg["zone_ids"]):
+        drawing.add(String(45 + i * 60, 2, f"Zone {zid}", fontSize=7,
+                           fillColor=ZONE_COLORS[i % len(ZONE_COLORS)]))
+    return drawing
+
+
+def generate_pdf(history_data, filename="dashboard/exports/report.pdf", progress_cb=None,
+                 threshold=None, interval=None, rows_per_page=40, zone_thresholds=None,
+                 exit_margin=0, breach_source="occupancy"):
+    """
+    Aggregates the history into intervals and renders charts, a per-zone
+    summary and the interval table split into page-sized chunks.
+    progress_cb: optional callable(fraction)
+    interval: bucket size in seconds; chosen from the time span when None
+    zone_thresholds / exit_margin / breach_source: see aggregate_history()
+    """
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
     doc = SimpleDocTemplate(filename, pagesize=A4)
     styles = getSampleStyleSheet()
     elements = []
 
+    if interval is None:
+        interval = choose_interval(history_data)
+    agg = aggregate_history(history_data, interval=interval, threshold=threshold, progress_cb=progress_cb,
+                            zone_thresholds=zone_thresholds, exit_margin=exit_margin, breach_source=breach_source)
+    breaches = threshold is not None or bool(zone_thresholds)
+    zone_ids = agg["zone_ids"]
+
     elements.append(Paragraph("Crowd Count System Report", styles['Title']))
     elements.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
+    if history_data:
+        elements.append(Paragraph(
+            f"Period: {_fmt_period(history_data)} | "
+            f"Samples: {len(history_data)} | Interval: {interval}s"
+            + (f" | Threshold: {threshold}" if threshold is not None else "")
+            + (" (per-zone overrides apply)" if zone_thresholds else ""),
+            styles['Normal']))
     elements.append(Spacer(1, 12))
 
-    # Table header
-    data = [["Time", "Total People"]]
-    zone_ids = sorted(set(zid for entry in history_data for zid in entry['zones'].keys()))
-    for zid in zone_ids:
-        data[0].append(f"Zone {zid}")
-
-    # Table rows
-    for entry in history_data:
-        row = [entry['time'], entry['total']]
-        for zid in zone_ids:
-            row.append(entry['zones'].get(zid, 0))
+    # Summary table
+    header = ["", "Min", "Max", "Mean", "Peak Time"] + (["Breaches"] if breaches else [])
+    data = [header]
+    line_keys = agg["line_keys"]
+    for k in ['total'] + zone_ids + line_keys:
+        z = agg["summary"][k]
+        label = "Total" if k == 'total' else (f"Line {k}" if k in line_keys else f"Zone {k}")
+        row = [label, z["min"], z["max"], f"{z['mean']:.1f}", z["peak_time"]]
+        if breaches:
+            row.append("-" if k == 'total' or k in line_keys else z["breaches"])
         data.append(row)
-
     table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), colors.grey),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('GRID', (0,0), (-1,-1), 1, colors.black),
-        ('BACKGROUND', (0,1), (-1,-1), colors.beige)
-    ]))
+    table.setStyle(TABLE_STYLE)
     elements.append(table)
+    elements.append(Spacer(1, 12))
+
+    # Charts
+    elements.append(_chart(agg, 2, "Mean count per interval"))
+    elements.append(Spacer(1, 12))
+    elements.append(_chart(agg, 1, "Max count per interval"))
+    if progress_cb:
+        progress_cb(0.5)
+
+    # Interval table, one small Table per page keeps layout cost linear
+    header = ["Interval", "Total (min/max/mean)"] + [f"Zone {zid}" for zid in zone_ids] + \
+             [f"Line {k}" for k in line_keys]
+    intervals = agg["intervals"]
+    for start in range(0, len(intervals), rows_per_page):
+        data = [header]
+        for row in intervals[start:start + rows_per_page]:
+            line = [row["start"], "%d / %d / %.1f" % row["total"]]
+            for zid in zone_ids:
+                line.append("%d / %d / %.1f" % row["zones"].get(zid, (0, 0, 0)))
+            for k in line_keys:
+                line.append("%d / %d / %.1f" % row["lines"].get(k, (0, 0, 0)))
+            data.append(line)
+        elements.append(PageBreak())
+        table = Table(data, repeatRows=1)
+        table.setStyle(TABLE_STYLE)
+        elements.append(table)
+
+    if progress_cb:
+        progress_cb(0.7)
     doc.build(elements)
-    return filename
\ No newline at end of file
+    if progress_cb:
+        progress_cb(1.0)
+    return filename
@@ -0,0 +1,98 @@
+# worker.py
+import threading
+import time
+
+
+class ProcessingWorker:
+    """
+    Supervised background thread for the video loop.
+    target(worker) must poll worker.should_stop() (or sleep with
+    worker.wait()) and call worker.frame_done() after each frame.
+    stop() cancels it and joins with a timeout, so a camera switch never
+    leaves an old loop running.
+    """
+
+    def __init__(self, target, name="video-processing"):
+        self.target = target
+        self.name = name
+        self.thread = None
+        self.state = "idle"  # idle / starting / running / stopping / stopped / stuck / failed
+        self.error = None
+        self.frames = 0
+        self.started_at = None
+        self.last_frame_at = None
+        self.switch_started = None
+        self.last_switch_latency = None
+        self._stop_event = threading.Event()
+
+    def start(self, switch_started=None):
+        """switch_started: monotonic time a camera switch was requested, to measure latency"""
+        if self.thread is not None and self.thread.is_alive():
+            raise RuntimeError("Worker is already running")
+        self._stop_event = threading.Event()
+        self.state = "starting"
+        self.error = None
+        self.frames = 0
+        self.started_at = time.monotonic()
+        self.switch_started = switch_started
+        self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            self.target(self)
+            self.state = "stopped"
+        except Exception as e:
+            print(f"Processing worker failed: {e}")
+            self.error = str(e)
+            self.state = "failed"
+
+    def should_stop(self):
+        return self._stop_event.is_set()
+
+    def wait(self, seconds):
+        """Sleep that returns early on cancellation; True if cancelled"""
+        return self._stop_event.wait(seconds)
+
+    def frame_done(self):
+        now = time.monotonic()
+        if self.frames == 0:
+            self.state = "running"
+            if self.switch_started is not None:
+                self.last_switch_latency = now - self.switch_started
+                print(f"Camera switch took {self.last_switch_latency:.2f}s to first frame")
+                self.switch_started = None
+        self.frames += 1
+        self.last_frame_at = now
+
+    def stop(self, timeout=5.0, on_timeout=None):
+        """
+        Cancel and join. If the thread is still alive after timeout (e.g.
+        blocked in a read), on_timeout() is called to unblock it and the
+        join is retried once. Returns True if the thread has exited.
+        """
+        if self.thread is None or not self.thread.is_alive():
+            return True
+        self.state = "stopping"
+        self._stop_event.set()
+        self.thread.join(timeout)
+        if self.thread.is_alive() and on_timeout is not None:
+            on_timeout()
+            self.thread.join(timeout)
+        if self.thread.is_alive():
+            self.state = "stuck"
+            return False
+        self.state = "stopped"
+        return True
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            "state": self.state,
+            "alive": self.thread is not None and self.thread.is_alive(),
+            "frames": self.frames,
+            "uptime": round(now - self.started_at, 1) if self.started_at else 0,
+            "seconds_since_frame": round(now - self.last_frame_at, 2) if self.last_frame_at else None,
+            "last_switch_latency": round(self.last_switch_latency, 3) if self.last_switch_latency is not None else None,
+            "error": self.error
+        }
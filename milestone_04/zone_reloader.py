@@ -0,0 +1,114 @@
+# zone_reloader.py
+import os
+import threading
+
+import zones as zones_module
+from zones import ZoneManager
+from detection.counter import ZoneCounter
+from detection.line_counter import LineCounter
+
+
+def counter_options(counting):
+    """ZoneCounter keyword arguments from the "counting" section of zones.json"""
+    options = {}
+    if counting.get("window") is not None:
+        options["window"] = counting["window"]
+    if counting.get("ttl") is not None:
+        options["ttl"] = float(counting["ttl"])
+    return options
+
+
+class ZoneReloader:
+    """
+    Watches zones.json and rebuilds everything derived from it (zone
+    manager, compiled counters, overlay layers) on a background thread.
+    The processing loop calls take() between frames and swaps the new
+    bundle in; carry-over of unchanged zones happens at that point.
+    A deleted zones.json is a change too: it yields an empty layout, the
+    same as starting without the file.
+
+    The optional "counting" section of zones.json sets the ZoneCounter's
+    rolling window ("hourly" / "daily") and seen-pair ttl in seconds.
+    """
+
+    MISSING = -1  # mtime stand-in while zones.json doesn't exist
+
+    def __init__(self, interval=1.0):
+        self.zones_file = zones_module.ZONES_FILE
+        self.interval = interval
+        self.frame_shape = None  # Last seen frame shape, to pre-render overlays
+        self._mtime = self._current_mtime()
+        self._pending = None
+        self._force = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _current_mtime(self):
+        try:
+            return os.stat(self.zones_file).st_mtime_ns
+        except OSError:
+            return self.MISSING
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="zone-reloader", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def request_reload(self):
+        """
+        Force a rebuild on the watcher thread (admin API). Returns False when
+        zones.json doesn't exist, in which case the rebuild clears all zones.
+        """
+        self._force = True
+        self._wake.set()
+        return self._current_mtime() != self.MISSING
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            mtime = self._current_mtime()
+            if mtime == self._mtime and not self._force:
+                continue
+            self._force = False
+            try:
+                bundle = self.build()
+            except Exception as e:
+                # Most likely caught mid-write; retried on the next tick
+                print(f"Zone reload failed: {e}")
+                continue
+            self._mtime = mtime
+            with self._lock:
+                self._pending = bundle
+            if mtime == self.MISSING:
+                print(f"{self.zones_file} not found, zones and lines cleared")
+            else:
+                print(f"Zones reloaded: {len(bundle['manager'].zones)} zones, {len(bundle['manager'].lines)} lines")
+
+    def build(self):
+        """Load zones.json and compile counters and overlays, off the hot path"""
+        manager = ZoneManager()
+        if not manager.load_zones():
+            raise ValueError(f"{self.zones_file} could not be parsed")
+        if self.frame_shape is not None:
+            manager.prepare_overlay(self.frame_shape)
+        return {
+            "manager": manager,
+            "counter": ZoneCounter(manager.zones, **counter_options(manager.counting)) if manager.zones else None,
+            "line_counter": LineCounter(manager.lines) if manager.lines else None,
+        }
+
+    def take(self):
+        """Return the newest built bundle once, or None"""
+        if self._pending is None:
+            return None
+        with self._lock:
+            bundle, self._pending = self._pending, None
+        return bundle
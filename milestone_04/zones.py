@@ -10,6 +10,8 @@ ZONES_FILE = "zones.json"  # Local file in project folder
 class ZoneManager:
     def __init__(self):
         self.zones = []
+        self.lines = []  # Directional tripwires: {"id", "name", "points": [[x1, y1], [x2, y2]]}
+        self.counting = {}  # ZoneCounter settings: {"window": "hourly" | "daily", "ttl": seconds}
         self.drawing = False
         self.current_points = []
         self.selected_zone_id = -1
@@ -19,56 +21,110 @@ class ZoneManager:
             (0, 255, 0), (255, 0, 0), (0, 0, 255), (255, 255, 0),
             (255, 0, 255), (0, 255, 255)
         ]
+        self._overlay_cache = {}  # (height, width, show_labels) -> rendered zone layers
 
     def load_zones(self):
-        """Load zones from local zones.json file"""
+        """Load zones from local zones.json file, returns False if it couldn't be parsed"""
+        self._overlay_cache = {}
         if os.path.exists(ZONES_FILE):
             try:
                 with open(ZONES_FILE, 'r') as f:
                     data = json.load(f)
                     self.zones = data.get('zones', [])
-                print(f"Loaded {len(self.zones)} zones from local {ZONES_FILE}")
+                    self.lines = data.get('lines', [])
+                    self.counting = data.get('counting', {})
+                print(f"Loaded {len(self.zones)} zones and {len(self.lines)} lines from local {ZONES_FILE}")
             except Exception as e:
                 print(f"Error loading zones: {e}")
                 self.zones = []
+                self.lines = []
+                self.counting = {}
+                return False
         else:
             print("No zones.json found. Starting with empty zones.")
             self.zones = []
+            self.lines = []
+            self.counting = {}
+        return True
 
     def save_zones(self):
         """Save zones to local zones.json file"""
         try:
-            data = {"zones": self.zones}
+            data = {"zones": self.zones, "lines": self.lines}
+            if self.counting:
+                data["counting"] = self.counting
             with open(ZONES_FILE, 'w') as f:
                 json.dump(data, f, indent=4)
             print(f"Saved {len(self.zones)} zones to local {ZONES_FILE}")
         except Exception as e:
             print(f"Error saving zones: {e}")
 
-    def draw_zones(self, frame, show_labels=True):
-        """Draw all saved zones on the frame"""
-        overlay = frame.copy()
-
+    def _draw_static(self, canvas, show_labels=True, mask_color=None):
+        """Outlines, labels and tripwires; with mask_color everything is drawn in that color"""
         for zone in self.zones:
-            points = np.array(zone['points'], np.int32)
-            points = points.reshape((-1, 1, 2))
-            color = zone.get('color', (0, 255, 0))
-
-            # Draw semi-transparent fill
-            cv2.fillPoly(overlay, [points], color)
-            cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
-
-            # Draw outline
-            cv2.polylines(frame, [points], True, color, 3)
+            points = np.array(zone['points'], np.int32).reshape((-1, 1, 2))
+            color = mask_color or tuple(zone.get('color', (0, 255, 0)))
+            cv2.polylines(canvas, [points], True, color, 3)
 
-            # Draw label
             if show_labels and len(points) > 0:
                 M = cv2.moments(points)
                 if M["m00"] != 0:
                     cx = int(M["m10"] / M["m00"])
                     cy = int(M["m01"] / M["m00"])
                     label = zone.get('name', f"Zone {zone['id']}")
-                    cv2.putText(frame, label, (cx - 40, cy), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+                    cv2.putText(canvas, label, (cx - 40, cy), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+
+        # Tripwire lines with an arrow pointing to the "in" side
+        for line in self.lines:
+            (x1, y1), (x2, y2) = line['points']
+            color = mask_color or tuple(line.get('color', (0, 0, 255)))
+            cv2.line(canvas, (int(x1), int(y1)), (int(x2), int(y2)), color, 3)
+            mx, my = (x1 + x2) / 2, (y1 + y2) / 2
+            dx, dy = x2 - x1, y2 - y1
+            norm = max((dx * dx + dy * dy) ** 0.5, 1e-6)
+            nx, ny = -dy / norm * 30, dx / norm * 30  # right-hand normal on screen
+            cv2.arrowedLine(canvas, (int(mx), int(my)), (int(mx + nx), int(my + ny)), color, 2, tipLength=0.4)
+            if show_labels:
+                label = line.get('name', f"Line {line['id']}")
+                cv2.putText(canvas, label, (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+    def prepare_overlay(self, shape, show_labels=True):
+        """
+        Render the zone layers for a frame shape once: the fill colors and
+        mask, and the outline/label/line layer and its mask.
+        """
+        key = (shape[0], shape[1], show_labels)
+        cached = self._overlay_cache.get(key)
+        if cached is not None:
+            return cached
+
+        h, w = shape[:2]
+        fill = np.zeros((h, w, 3), np.uint8)
+        fill_mask = np.zeros((h, w), np.uint8)
+        for zone in self.zones:
+            points = np.array(zone['points'], np.int32).reshape((-1, 1, 2))
+            cv2.fillPoly(fill, [points], tuple(zone.get('color', (0, 255, 0))))
+            cv2.fillPoly(fill_mask, [points], 255)
+
+        static = np.zeros((h, w, 3), np.uint8)
+        static_mask = np.zeros((h, w), np.uint8)
+        self._draw_static(static, show_labels)
+        self._draw_static(static_mask, show_labels, mask_color=255)
+
+        cached = (fill, fill_mask.astype(bool)[..., None], static, static_mask.astype(bool)[..., None])
+        self._overlay_cache[key] = cached
+        return cached
+
+    def draw_zones(self, frame, show_labels=True):
+        """Draw all saved zones on the frame using the cached overlay layers"""
+        fill, fill_mask, static, static_mask = self.prepare_overlay(frame.shape, show_labels)
+
+        # Semi-transparent fill inside the zones
+        blended = cv2.addWeighted(frame, 0.7, fill, 0.3, 0)
+        np.copyto(frame, blended, where=fill_mask)
+
+        # Outlines, labels and lines
+        np.copyto(frame, static, where=static_mask)
 
         # Draw current drawing preview
         if self.drawing and len(self.current_points) > 0: